@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for Terrain.check_collision
+
+Times one collision check at several window widths. Every width runs in a
+fresh interpreter with src.settings patched before the game modules are
+imported, because the rest of the code reads the constants at import time.
+The cost per check should stay flat as the window (and column count) grows.
+
+Usage:
+    python benchmarks/bench_collision.py
+"""
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WIDTHS = [500, 1000, 2000, 4000, 8000]
+NUMBER = 200000
+SEED = 0  # Terrain seed, so every width measures the same walk
+
+
+def measure(width):
+    """Return nanoseconds per check_collision call at the given width"""
+    sys.path.insert(0, ROOT)
+    import src.settings as settings
+    settings.WIN_WIDTH = width
+
+    import pygame
+    from src.terrain import Terrain
+
+    terrain = Terrain(None)
+    terrain.reset(SEED)
+    for _ in range(37):
+        terrain.update()
+
+    # A player sitting in the middle of the gap never hits, so every
+    # candidate column is examined: the worst case for the check
+    top_height = terrain.heights[(terrain.start + 10) % terrain.capacity]
+    player_rect = pygame.Rect(settings.PLAYER_START_X - settings.PLAYER_RADIUS,
+                              top_height + 130, 40, 40)
+    assert not terrain.check_collision(player_rect)
+
+    seconds = min(timeit.repeat(lambda: terrain.check_collision(player_rect),
+                                number=NUMBER, repeat=5))
+    return {"width": width, "columns": terrain.count, "ns_per_check": seconds / NUMBER * 1e9}
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        print(json.dumps(measure(int(sys.argv[2]))))
+        return
+
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    results = []
+    for width in WIDTHS:
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(width)], env=env
+        )
+        results.append(json.loads(output))
+
+    base = results[0]["ns_per_check"]
+    print(f"{'width':>6} {'columns':>8} {'ns/check':>10} {'vs first':>9}")
+    for result in results:
+        print(f"{result['width']:>6} {result['columns']:>8} "
+              f"{result['ns_per_check']:>10.1f} {result['ns_per_check'] / base:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
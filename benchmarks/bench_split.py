@@ -0,0 +1,158 @@
+"""
+Single-process vs split frame times
+
+Plays the game in real time with the default loop (clock.tick(FPS), then
+handle_events, update and draw) once with the simulation in the game's
+process and once with --split, where it steps in a child process over
+shared memory. An autopilot steers through the gap by pressing and
+releasing SPACE, and a crash restarts the same terrain.
+
+Every scenario runs both modes:
+- steady   frames as they come
+- stalls   every --stall-every frames the draw blocks for --stall-ms,
+           like a slow flip or a compositor hitch
+
+Reported per run:
+- frame    time between frames (p50 / p99 / max)
+- work     handle_events + update + draw of one frame, without the FPS wait
+- steps/s  simulation steps per second of wall time (TICK_RATE when none
+           are dropped)
+- late     how long after its due time each step ran (p50 / p99 / max).
+           Both modes count it the same way: a step is due a tick after
+           the previous one, and the schedule restarts after a backlog of
+           MAX_TICKS_PER_FRAME steps is dropped. With split the child
+           process publishes the figure with every step and the steps the
+           game saw are sampled.
+
+Usage:
+    python benchmarks/bench_split.py
+    python benchmarks/bench_split.py --seconds 10 --renderer surfarray --stall-ms 100
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED = 1234
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, len(ordered) * p // 100)] if ordered else 0.0
+
+
+def play(game, seconds, stall_every, stall):
+    """Play for `seconds` with the autopilot, returning per-frame and per-step timings"""
+    import pygame
+    from src.settings import FPS, MAX_TICKS_PER_FRAME
+
+    tick_time = game.tick_time
+    frames = []
+    work = []
+    late = []
+    steps = 0
+    crashes = 0
+
+    if stall:
+        draw = game.renderer.draw
+
+        def stalling_draw(game):
+            draw(game)
+            if len(frames) % stall_every == stall_every - 1:
+                time.sleep(stall)
+        game.renderer.draw = stalling_draw
+
+    due = [None]
+    if game.process is None:
+        # Time every step against the same schedule the split child keeps
+        sim_step = game.sim.step
+
+        def step(action):
+            now = time.perf_counter()
+            if due[0] is None:
+                due[0] = now
+            late.append(now - due[0])
+            due[0] += tick_time
+            if now - due[0] > MAX_TICKS_PER_FRAME * tick_time:
+                due[0] = now
+            return sim_step(action)
+        game.sim.step = step
+
+    game.state = "PLAYING"
+    game.reset_game(SEED)
+    held = None  # The first frame presses SPACE to start the run
+    game.clock.tick()
+    started = time.perf_counter()
+    last = started
+    while last - started < seconds:
+        top_height, bottom_height = game.terrain.column_at(game.player.x + 40)
+        wanted = held is None or game.player.y > (top_height + bottom_height) / 2
+        events = []
+        if wanted != held:
+            events.append(pygame.event.Event(pygame.KEYDOWN if wanted else pygame.KEYUP, key=pygame.K_SPACE))
+            held = wanted
+
+        elapsed = game.clock.tick(FPS) / 1000
+        begun = time.perf_counter()
+        frame = game.sim.frame
+        game.handle_events(events)
+        game.update(elapsed)
+        game.draw()
+        now = time.perf_counter()
+        work.append(now - begun)
+        frames.append(now - last)
+        last = now
+        if game.sim.frame != frame:
+            steps += game.sim.frame - frame
+            if game.process is not None:
+                late.append(game.process.lateness())
+
+        if game.state == "GAME_OVER":
+            crashes += 1
+            game.state = "PLAYING"
+            game.reset_game(SEED)
+            held = None
+            due[0] = None  # Both modes start the schedule at the first step
+
+    if stall:
+        game.renderer.draw = draw
+    if game.process is None:
+        game.sim.step = sim_step
+    return frames, work, late, steps / (last - started), crashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare frame times with and without --split")
+    parser.add_argument("--seconds", type=float, default=5, help="play time per run (default 5)")
+    parser.add_argument("--renderer", default="pygame", help="drawing backend (default pygame)")
+    parser.add_argument("--stall-every", type=int, default=30, metavar="FRAMES",
+                        help="frames between stalls in the stalls scenario (default 30)")
+    parser.add_argument("--stall-ms", type=float, default=50,
+                        help="length of each stall (default 50)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)  # Assets and fonts are loaded relative to the repo
+    import pygame
+    from src.game import Game
+
+    print(f"{'scenario':<8} {'mode':<7} {'frame p50/p99/max ms':>22} {'work p50/p99 ms':>16} "
+          f"{'steps/s':>8} {'late p50/p99/max ms':>21} {'crashes':>8}")
+    for scenario, stall in (("steady", 0.0), ("stalls", args.stall_ms / 1000)):
+        for mode in ("single", "split"):
+            game = Game(renderer=args.renderer, split=mode == "split")
+            frames, work, late, rate, crashes = play(game, args.seconds, args.stall_every, stall)
+            if game.process is not None:
+                game.process.close()
+            ms = lambda samples, *ps: "/".join(f"{percentile(samples, p) * 1000:.2f}" for p in ps)
+            print(f"{scenario:<8} {mode:<7} {ms(frames, 50, 99, 100):>22} {ms(work, 50, 99):>16} "
+                  f"{rate:>8.1f} {ms(late, 50, 99, 100):>21} {crashes:>8}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
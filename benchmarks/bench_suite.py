@@ -0,0 +1,270 @@
+"""
+Benchmark suite
+
+Times the hot paths of the game:
+- Terrain.generate_new
+- Terrain.update
+- Terrain.check_collision
+- Terrain.draw, and the surfarray renderer's terrain rasterizer
+- Game.draw_score
+- drawing GHOSTS ghost helicopters
+- updating and drawing a full PARTICLE_CAPACITY of particles
+- one full Game.update + Game.draw frame with every renderer
+
+Terrain speed is swept from INITIAL_MAP_SPEED to MAX_SPEED, and every
+WIN_WIDTH x RECT_WIDTH combination runs in a fresh interpreter with
+src.settings patched before the game modules are imported. Drawing uses
+SDL's dummy video driver, so no window opens and the numbers do not depend
+on a compositor. Terrain is seeded, so every run does the same work.
+
+Results can be saved as a JSON baseline and later runs compared against it.
+Anything slower than the baseline by more than the threshold is flagged,
+and the exit status is 1. Timings depend on the machine, so no baseline is
+committed; save benchmarks/baseline.json (ignored by git) on the machine
+the comparisons will run on, before the change being measured.
+
+Usage:
+    python benchmarks/bench_suite.py --save benchmarks/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json
+    python benchmarks/bench_suite.py --quick --configs 1000x10
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGS = ["1000x10", "1000x5", "1000x2", "2000x10", "4000x10"]  # WIN_WIDTH x RECT_WIDTH
+REPEAT = 5
+SEED = 1234
+GHOSTS = 500
+
+
+def best_of(run, number, quick):
+    """Microseconds per iteration of run(number), best of several repeats"""
+    if quick:
+        number = max(1, number // 10)
+    times = []
+    for _ in range(2 if quick else REPEAT):
+        times.append(run(number))
+    return min(times) / number * 1e6
+
+
+def timed_calls(fn):
+    """run(number) timing `number` back to back calls of fn"""
+    def run(number):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - started
+    return run
+
+
+def timed_after(prepare, fn):
+    """run(number) timing only fn, with prepare called untimed before each call"""
+    def run(number):
+        total = 0.0
+        for _ in range(number):
+            prepare()
+            started = time.perf_counter()
+            fn()
+            total += time.perf_counter() - started
+        return total
+    return run
+
+
+def measure(config, quick):
+    """Run every benchmark for one WIN_WIDTH x RECT_WIDTH and return the results"""
+    width, rect_width = (int(value) for value in config.split("x"))
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)  # Assets and fonts are loaded relative to the repo
+    import src.settings as settings
+    settings.WIN_WIDTH = width
+    settings.RECT_WIDTH = rect_width
+
+    import pygame
+    from src.game import Game
+    from src.ghosts import Ghosts
+    from src.particles import Particles, DEBRIS
+    from src.replay import Replay
+    from src.renderer import RENDERERS, SurfarrayRenderer
+
+    game = Game()
+    terrain = game.terrain
+    player = game.player
+
+    speeds = []
+    speed = settings.INITIAL_MAP_SPEED
+    while speed < settings.MAX_SPEED:
+        speeds.append(speed)
+        speed *= 2
+    speeds.append(settings.MAX_SPEED)
+
+    results = []
+
+    def record(name, us, speed=None):
+        results.append({"config": config, "name": name, "speed": speed, "us": us})
+
+    terrain.reset(SEED)
+    record("terrain.generate_new", best_of(timed_calls(terrain.generate_new), 2000, quick))
+
+    # Collision cost does not depend on speed. A player in the middle of the
+    # gap never hits, so every candidate column is examined.
+    terrain.reset(SEED)
+    top_height, bottom_height = terrain.column_at(player.x)
+    player.y = (top_height + bottom_height) / 2
+    player_rect = player.get_rect()
+    record("terrain.check_collision",
+           best_of(timed_calls(lambda: terrain.check_collision(player_rect)), 100000, quick))
+
+    for speed in speeds:
+        terrain.reset(SEED)
+        terrain.speed = speed
+        record("terrain.update", best_of(timed_calls(terrain.update), 20000, quick), speed)
+
+        terrain.reset(SEED)
+        terrain.speed = speed
+        terrain.draw()
+        record("terrain.draw", best_of(timed_after(terrain.update, terrain.draw), 500, quick), speed)
+
+        surfarray = SurfarrayRenderer(game.window)
+        terrain.reset(SEED)
+        terrain.speed = speed
+        record("surfarray.draw_terrain",
+               best_of(timed_after(terrain.update, lambda: surfarray.draw_terrain(terrain, 1.0)), 500, quick), speed)
+
+    # The HUD with an unchanged score is all cache hits; a new score costs
+    # one text render
+    game.state = "PLAYING"
+    game.reset_game()
+    game.game_started = True
+    record("game.draw_score", best_of(timed_calls(game.draw_score), 5000, quick))
+
+    def next_score():
+        terrain.score += 1
+    record("game.draw_score new score", best_of(timed_after(next_score, game.draw_score), 2000, quick))
+
+    # Ghosts bob around the start height with periods of 20 to 60 frames
+    # and all fly for the whole run
+    replays = []
+    for i in range(GHOSTS):
+        period = 20 + i % 41
+        events = [(0, True)] + [(frame, j % 2 == 1) for j, frame in enumerate(range(period // 2, 2000, period))]
+        replays.append(Replay(SEED, "Normal", events, frames=2000))
+    ghosts = Ghosts(replays)
+    record(f"ghosts.draw {GHOSTS}",
+           best_of(timed_calls(lambda: ghosts.draw(game.window, 1000, 0.5)), 500, quick))
+
+    # A full particle array: each update drops the particles that left the
+    # window, and the budget's worth of new ones tops it up again
+    particles = Particles(seed=SEED)
+
+    def particle_frame():
+        particles.update(1 / settings.FPS)
+        particles.emit(particles.capacity, settings.WIN_WIDTH // 2, settings.WIN_HEIGHT // 2,
+                       0, 0, 200, 2.0, settings.DEBRIS_GRAVITY, DEBRIS)
+    for _ in range(settings.FPS):
+        particle_frame()
+    record(f"particles.update {particles.capacity}", best_of(timed_calls(particle_frame), 2000, quick))
+    record(f"particles.draw {particles.capacity}",
+           best_of(timed_calls(lambda: particles.draw(game.window)), 2000, quick))
+
+    # The default renderer keeps the plain name so older baselines still compare
+    for renderer in RENDERERS:
+        game.renderer = RENDERERS[renderer](game.window)
+        name = "game.frame" if renderer == "pygame" else f"game.frame {renderer}"
+        for speed in speeds:
+            game.reset_game()
+            game.game_started = True
+            game.sim.difficulty = "Normal"
+            # Hold the speed: update_difficulty derives it from speed_level
+            terrain.speed_level = speed - settings.INITIAL_MAP_SPEED
+            terrain.next_speed_threshold = float("inf")
+
+            def steer():
+                # Keep the helicopter mid-gap so the run never ends; a crash
+                # would switch the game to its (cheaper) game over screen
+                top_height, bottom_height = terrain.column_at(player.x)
+                player.y = player.previous_y = (top_height + bottom_height) / 2
+                player.y_speed = 0
+                game.sim.done = False
+                game.state = "PLAYING"
+
+            def frame():
+                game.update()
+                game.draw()
+            record(name, best_of(timed_after(steer, frame), 500, quick), speed)
+
+    pygame.quit()
+    return results
+
+
+def key(result):
+    speed = f" speed={result['speed']}" if result["speed"] is not None else ""
+    return f"{result['config']} {result['name']}{speed}"
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "--worker":
+        print(json.dumps(measure(sys.argv[2], "--quick" in sys.argv)))
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths")
+    parser.add_argument("--configs", nargs="+", default=CONFIGS, metavar="WIDTHxRECT",
+                        help="WIN_WIDTH x RECT_WIDTH combinations to run")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, noisier numbers")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="flag results this much slower than the baseline (default 0.10)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    results = []
+    for config in args.configs:
+        command = [sys.executable, os.path.abspath(__file__), "--worker", config]
+        if args.quick:
+            command.append("--quick")
+        results += json.loads(subprocess.check_output(command, env=env))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {key(result): result["us"] for result in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"{'benchmark':<48} {'us':>10}" + (f" {'baseline':>10} {'change':>8}" if baseline else ""))
+    for result in results:
+        line = f"{key(result):<48} {result['us']:>10.2f}"
+        old = baseline.get(key(result))
+        if old:
+            change = result["us"] / old - 1
+            line += f" {old:>10.2f} {change:>+7.1%}"
+            if change > args.threshold:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+
+    if args.save:
+        os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+        import pygame
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "pygame": pygame.version.ver,
+                "machine": platform.machine(),
+                "platform": platform.platform(),
+                "quick": args.quick,
+                "results": results,
+            }, f, indent=2)
+
+    if baseline:
+        print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
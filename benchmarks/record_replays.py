@@ -0,0 +1,78 @@
+"""
+Regression replay set
+
+Records the replays in benchmarks/replays that replay_regression.py checks.
+Each one is a headless run of the lookahead autopilot on a fixed seed, with
+a seeded share of frames flipped so every run makes mistakes and
+eventually crashes. The runs only depend on the seeds and the game rules,
+so recording again gives the same files until the terrain or physics
+change.
+
+Replays stop loading when the replay format version is bumped (see
+src/replay.py). Record the set again after such a change and commit it
+with the change.
+
+Usage:
+    python benchmarks/record_replays.py
+    python benchmarks/record_replays.py --directory /tmp/replays --runs 2
+"""
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORY = os.path.join(ROOT, "benchmarks", "replays")
+DIFFICULTIES = ["Easy", "Normal", "Hard"]
+MISTAKES = 0.02  # Share of frames where the autopilot's choice is flipped
+MAX_FRAMES = 20000  # A run still flying by then is dropped: replays must end in a crash
+
+
+def record(seed, difficulty):
+    """Play the autopilot on seed and return its replay, or None if it never crashed"""
+    from src.autopilot import lookahead
+    from src.replay import Replay
+    from src.simulation import Simulation
+
+    sim = Simulation(difficulty)
+    sim.reset(seed)
+    replay = Replay(seed, difficulty)
+    mistakes = random.Random(seed)
+    held = False
+    done = False
+    while not done and sim.frame < MAX_FRAMES:
+        # The first frame presses SPACE, which is what starts a real run
+        wanted = sim.frame == 0 or lookahead(sim) != (mistakes.random() < MISTAKES)
+        if wanted != held:
+            replay.events.append((sim.frame, wanted))
+            held = wanted
+        _, score, done = sim.step(held)
+    if not done:
+        return None
+    replay.score = score
+    replay.frames = sim.frame
+    return replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the replays replay_regression.py checks")
+    parser.add_argument("--directory", default=DIRECTORY,
+                        help="where to write the replays (default benchmarks/replays)")
+    parser.add_argument("--runs", type=int, default=2, help="replays per difficulty (default 2)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.makedirs(args.directory, exist_ok=True)
+    for difficulty in DIFFICULTIES:
+        for seed in range(1, args.runs + 1):
+            replay = record(seed, difficulty)
+            if replay is None:
+                print(f"{difficulty} seed {seed}: still flying after {MAX_FRAMES} frames, skipped")
+                continue
+            path = os.path.join(args.directory, f"{difficulty.lower()}-{seed}.replay")
+            replay.save(path)
+            print(f"{path}: score {replay.score} in {replay.frames} frames")
+
+
+if __name__ == "__main__":
+    main()
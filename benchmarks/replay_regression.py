@@ -0,0 +1,349 @@
+"""
+Replay regression harness
+
+Plays every recorded replay in a directory through the real Game: SPACE
+presses and releases are fed to Game.handle_events as key events and the
+run is advanced one Game.update step at a time, with the null renderer so
+nothing is drawn. Each replay must end with the score and frame count it
+recorded. Simulated frames per second are reported per replay and can be
+saved as a JSON baseline; a later run fails if any replay's throughput
+drops below its baseline by more than the threshold.
+
+With --determinism every replay is played twice on the same Game and the
+Helicopter and Terrain state is compared after every frame. The first
+frame that differs is reported with the fields that differ, which catches
+hidden randomness as well as state leaking through a reset.
+
+With --batch all replays of a difficulty are also played at once by one
+BatchSimulation, each game on its replay's seed and inputs, and every
+game's helicopter, scroll, score and visible terrain must equal the Game's
+after every frame.
+
+With --rewind every replay stops halfway to practise the next stretch:
+REWIND_CYCLES times it plays on with varied input and rewinds back, as a
+player repeating a hard section would. The state must be the same after
+practising as before, and the replay must still end with its recorded
+score.
+
+With --ghosts the y trajectory src/ghosts.py precomputes for every replay
+must equal the helicopter's y in the Game after every frame.
+
+The replays committed in benchmarks/replays come from record_replays.py.
+Baselines depend on the machine and are not committed; save one where the
+comparisons will run.
+
+Usage:
+    python benchmarks/replay_regression.py benchmarks/replays
+    python benchmarks/replay_regression.py benchmarks/replays --save benchmarks/replay_baseline.json
+    python benchmarks/replay_regression.py benchmarks/replays --compare benchmarks/replay_baseline.json
+    python benchmarks/replay_regression.py benchmarks/replays --determinism
+    python benchmarks/replay_regression.py benchmarks/replays --batch
+    python benchmarks/replay_regression.py benchmarks/replays --rewind
+    python benchmarks/replay_regression.py benchmarks/replays --ghosts
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 5
+REWIND_CYCLES = 300  # Practice loops per replay with --rewind
+
+
+def play(game, replay, on_frame=None):
+    """Play replay through game and return (score, frames, seconds)
+
+    on_frame(game) is called after every simulation step.
+    """
+    import pygame
+
+    game.menu.difficulty = replay.difficulty
+    game.state = "PLAYING"
+    game.reset_game(replay.seed)
+    sim = game.sim
+    events = replay.events
+    next_event = 0
+    started = time.perf_counter()
+    # Never run past the recorded end: a diverging replay must not loop forever
+    while game.state == "PLAYING" and sim.frame <= replay.frames:
+        # Hand over every SPACE change made before this frame's update
+        pending = []
+        while next_event < len(events) and events[next_event][0] <= sim.frame:
+            pressed = events[next_event][1]
+            pending.append(pygame.event.Event(pygame.KEYDOWN if pressed else pygame.KEYUP,
+                                              key=pygame.K_SPACE))
+            next_event += 1
+        game.handle_events(pending)
+
+        frame = sim.frame
+        game.update()
+        game.draw()
+        if sim.frame == frame:
+            # Waiting for a SPACE press the replay never makes
+            break
+        if on_frame is not None:
+            on_frame(game)
+    return sim.score, sim.frame, time.perf_counter() - started
+
+
+def snapshot(game):
+    """Everything about the Helicopter and Terrain that the next frame depends on"""
+    player = game.player
+    terrain = game.terrain
+    generator = terrain.generator
+    return {
+        "player.y": player.y,
+        "player.previous_y": player.previous_y,
+        "player.y_speed": player.y_speed,
+        "player.flying": player.flying,
+        "terrain.x": terrain.x,
+        "terrain.columns": [terrain.heights[(terrain.start + i) % terrain.capacity] for i in range(terrain.count)],
+        "terrain.generated": terrain.generated,
+        "terrain.speed": terrain.speed,
+        "terrain.spacer": terrain.spacer,
+        "terrain.score": terrain.score,
+        "terrain.speed_level": terrain.speed_level,
+        "generator.lookahead": generator.buffer[generator.pos:],
+        "generator.taken": generator.taken,
+        "generator.rejected": generator.rejected,
+    }
+
+
+def check_determinism(game, replay):
+    """Play replay twice and return (frame, differing fields) of the first difference, or None"""
+    first = []
+    play(game, replay, lambda game: first.append(snapshot(game)))
+    second = []
+    play(game, replay, lambda game: second.append(snapshot(game)))
+
+    for frame, (a, b) in enumerate(zip(first, second), 1):
+        fields = [name for name in a if a[name] != b[name]]
+        if fields:
+            return frame, fields
+    if len(first) != len(second):
+        return min(len(first), len(second)) + 1, ["frames"]
+    return None
+
+
+def space_held(replay):
+    """Whether SPACE is held during each of replay's steps, as play() hands it over"""
+    held = []
+    pressed = False
+    next_event = 0
+    for frame in range(replay.frames):
+        while next_event < len(replay.events) and replay.events[next_event][0] <= frame:
+            pressed = replay.events[next_event][1]
+            next_event += 1
+        held.append(pressed)
+    return held
+
+
+def game_state(game):
+    """What a batch game must match after every frame"""
+    terrain = game.terrain
+    return {
+        "y": game.player.y,
+        "y_speed": game.player.y_speed,
+        "x": terrain.x,
+        "speed": terrain.speed,
+        "score": terrain.score,
+        "columns": [terrain.heights[(terrain.start + i) % terrain.capacity] for i in range(terrain.count)],
+        "done": game.sim.done,
+    }
+
+
+def batch_state(batch, i):
+    """game_state of game i of a BatchSimulation"""
+    start = int(batch.start[i])
+    return {
+        "y": float(batch.y[i]),
+        "y_speed": float(batch.y_speed[i]),
+        "x": float(batch.x[i]),
+        "speed": float(batch.speed[i]),
+        "score": int(batch.score[i]),
+        "columns": [int(batch.heights[i, (start + j) % batch.capacity]) for j in range(batch.count[i])],
+        "done": bool(batch.done[i]),
+    }
+
+
+def check_batch(game, replays):
+    """Play replays in batches and through game, returning (frame, differing fields) or None per replay"""
+    from src.batch import BatchSimulation
+
+    differences = [None] * len(replays)
+    for difficulty in sorted({replay.difficulty for replay in replays}):
+        group = [i for i, replay in enumerate(replays) if replay.difficulty == difficulty]
+        expected = []
+        for i in group:
+            states = []
+            play(game, replays[i], lambda game: states.append(game_state(game)))
+            expected.append(states)
+        held = [space_held(replays[i]) for i in group]
+
+        batch = BatchSimulation(len(group), difficulty)
+        batch.reset(seeds=[replays[i].seed for i in group])
+        for frame in range(max(len(states) for states in expected)):
+            batch.step([frame < len(actions) and actions[frame] for actions in held])
+            for game_index, (i, states) in enumerate(zip(group, expected)):
+                if frame >= len(states) or differences[i] is not None:
+                    continue
+                got = batch_state(batch, game_index)
+                fields = [name for name in got if got[name] != states[frame][name]]
+                if fields:
+                    differences[i] = frame + 1, fields
+    return differences
+
+
+def check_rewind(game, replay):
+    """Practise the middle of replay with rewinds and return what changed, or None"""
+    from src.autopilot import lookahead
+
+    choices = random.Random(replay.seed)
+    changed = []
+
+    def practise(game):
+        if game.sim.frame != replay.frames // 2:
+            return
+        sim = game.sim
+        before = snapshot(game)
+        for cycle in range(REWIND_CYCLES):
+            steps = 0
+            for _ in range(choices.randint(100, 180)):
+                sim.step(lookahead(sim) if choices.random() > 0.1 else choices.random() < 0.5)
+                game.rewind.record()
+                steps += 1
+                if sim.done:
+                    break
+            game.rewind.restore(steps)
+            fields = [name for name, value in snapshot(game).items() if value != before[name]]
+            if fields:
+                changed.append(f"after {cycle + 1} rewinds: {', '.join(fields)}")
+                return
+
+    score, frames, _ = play(game, replay, practise)
+    if not changed and (score, frames) != (replay.score, replay.frames):
+        changed.append(f"scored {score} in {frames} frames")
+    return changed[0] if changed else None
+
+
+def check_ghost(game, replay):
+    """Play replay and return the first frame where its ghost's y differs from the helicopter's, or None"""
+    from src.ghosts import Ghosts
+
+    ghost = Ghosts([replay]).y[:, 0]
+    flown = []
+    play(game, replay, lambda game: flown.append(game.player.y))
+    for frame, y in enumerate(flown, 1):
+        if frame >= len(ghost) or y != ghost[frame]:
+            return frame
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check recorded replays against the real game loop")
+    parser.add_argument("directory", help="directory of .replay files")
+    parser.add_argument("--determinism", action="store_true",
+                        help="play every replay twice and compare the state after every frame")
+    parser.add_argument("--batch", action="store_true",
+                        help="also play the replays in a BatchSimulation and compare every frame")
+    parser.add_argument("--rewind", action="store_true",
+                        help="rewind over the middle of every replay many times and check nothing changed")
+    parser.add_argument("--ghosts", action="store_true",
+                        help="compare every replay's ghost trajectory with the helicopter's y")
+    parser.add_argument("--save", metavar="PATH", help="write frames/s per replay as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail replays slower than a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed throughput drop below the baseline (default 0.10)")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.directory, "*.replay")))
+    if not paths:
+        print(f"no .replay files in {args.directory}")
+        sys.exit(2)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)  # Assets and fonts are loaded relative to the repo
+    import pygame
+    from src.game import Game
+    from src.replay import Replay, ReplayError
+
+    game = Game(renderer="null")
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["fps"]
+
+    failures = 0
+    replays = {}
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            replays[name] = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"{name}: ERROR {e}")
+            failures += 1
+    if args.batch:
+        batch_differences = dict(zip(replays, check_batch(game, list(replays.values()))))
+
+    fps = {}
+    for name, replay in replays.items():
+        # Best of a few plays, so one scheduling hiccup does not fail the run
+        results = [play(game, replay) for _ in range(REPEAT)]
+        score, frames, _ = results[0]
+        fps[name] = frames / min(seconds for _, _, seconds in results)
+        problems = []
+        if (score, frames) != (replay.score, replay.frames):
+            problems.append(f"MISMATCH simulated {score} in {frames} frames, "
+                            f"recorded {replay.score} in {replay.frames}")
+
+        old = baseline.get(name)
+        line = f"{name}: {fps[name]:>10,.0f} frames/s"
+        if old:
+            change = fps[name] / old - 1
+            line += f" (baseline {old:,.0f}, {change:+.1%})"
+            if change < -args.threshold:
+                problems.append("SLOWER than baseline")
+
+        if args.determinism:
+            difference = check_determinism(game, replay)
+            if difference is not None:
+                frame, fields = difference
+                problems.append(f"NONDETERMINISTIC at frame {frame}: {', '.join(fields)}")
+
+        if args.batch and batch_differences[name] is not None:
+            frame, fields = batch_differences[name]
+            problems.append(f"BATCH MISMATCH at frame {frame}: {', '.join(fields)}")
+
+        if args.rewind:
+            difference = check_rewind(game, replay)
+            if difference is not None:
+                problems.append(f"REWIND CHANGED STATE {difference}")
+
+        if args.ghosts:
+            frame = check_ghost(game, replay)
+            if frame is not None:
+                problems.append(f"GHOST MISMATCH at frame {frame}")
+
+        failures += bool(problems)
+        print(f"{line}  {'; '.join(problems) or 'OK'}")
+
+    pygame.quit()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"fps": fps}, f, indent=2)
+
+    print(f"\n{failures} of {len(paths)} replay(s) failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
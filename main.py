@@ -4,12 +4,75 @@ Copter Game - Main Entry Point
 A helicopter navigation game where you fly through dynamically generated terrain.
 Use SPACEBAR to control the helicopter's altitude and avoid obstacles.
 """
+import time
+STARTED = time.perf_counter()
+
+import argparse
+import glob
+import os
 from src.game import Game
+from src.ghosts import Ghosts
+from src.profiler import StartupTimer
+from src.renderer import RENDERERS
+from src.settings import REWIND_SECONDS, REWIND_MAX_BYTES
 
 
 def main():
     """Initialize and run the game"""
-    game = Game()
+    parser = argparse.ArgumentParser(description="Copter game")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save a replay of every finished run into DIR")
+    parser.add_argument("--profile", metavar="PREFIX", nargs="?", const="profile",
+                        default=os.environ.get("COPTER_PROFILE") or None,
+                        help="time every frame phase, show an overlay and save PREFIX.csv/.json "
+                             "on exit (also enabled by COPTER_PROFILE=PREFIX)")
+    parser.add_argument("--startup-timing", action="store_true",
+                        default=bool(os.environ.get("COPTER_STARTUP_TIMING")),
+                        help="print how long each startup phase took, up to the first frame, "
+                             "and the rewind buffer's size (also enabled by COPTER_STARTUP_TIMING=1)")
+    parser.add_argument("--ghosts", metavar="DIR",
+                        help="race ghosts of the replays in DIR (those sharing the most common "
+                             "seed and difficulty)")
+    parser.add_argument("--rewind-seconds", type=float, default=REWIND_SECONDS,
+                        help=f"seconds of play kept for rewinding (default {REWIND_SECONDS})")
+    parser.add_argument("--rewind-memory", type=int, default=REWIND_MAX_BYTES // 1024, metavar="KB",
+                        help="cap on rewind snapshot memory; fewer seconds are kept if they "
+                             f"do not fit (default {REWIND_MAX_BYTES // 1024})")
+    parser.add_argument("--renderer", choices=list(RENDERERS), default="pygame",
+                        help="drawing backend (null draws nothing)")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="poll input at the last moment before each frame's update")
+    parser.add_argument("--vsync", action="store_true",
+                        help="pace frames by the display's refresh instead of the FPS cap")
+    parser.add_argument("--latency", action="store_true",
+                        help="print a histogram of SPACE input-to-screen latency on exit")
+    parser.add_argument("--split", action="store_true",
+                        help="step the simulation in its own process, shared with the game "
+                             "through shared memory (no recording or rewind)")
+    args = parser.parse_args()
+    if args.split and args.record:
+        parser.error("--record needs the simulation in the game's process, not --split")
+    
+    startup = None
+    if args.startup_timing:
+        startup = StartupTimer(STARTED)
+        startup.mark("imports")
+    
+    ghosts = None
+    if args.ghosts:
+        try:
+            ghosts = Ghosts.load(sorted(glob.glob(os.path.join(args.ghosts, "*.replay"))))
+        except ValueError as e:
+            parser.error(f"--ghosts {args.ghosts}: {e}")
+        print(f"racing {ghosts.count} ghost(s) on seed {ghosts.seed} ({ghosts.difficulty})")
+    
+    game = Game(record_dir=args.record, profile=args.profile, startup=startup,
+                renderer=args.renderer, low_latency=args.low_latency, vsync=args.vsync,
+                measure_latency=args.latency, ghosts=ghosts,
+                rewind_seconds=args.rewind_seconds, rewind_bytes=args.rewind_memory * 1024,
+                split=args.split)
+    if args.startup_timing and game.rewind is not None:
+        print(game.rewind.report())
     game.run()
 
 
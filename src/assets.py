@@ -0,0 +1,44 @@
+"""
+Lazily loaded fonts and images
+
+Nothing is read from disk until something first asks for it, and every
+asset is loaded once and shared. Images are converted to the display's
+pixel format when loaded, so blitting them never converts per pixel.
+"""
+import pygame
+from src.settings import *
+
+_fonts = {}
+_images = {}
+
+
+def clear():
+    """Forget every loaded asset; call before pygame.quit() makes them unusable"""
+    _fonts.clear()
+    _images.clear()
+
+
+def font(size):
+    """The game font at the given size"""
+    loaded = _fonts.get(size)
+    if loaded is None:
+        loaded = _fonts[size] = pygame.font.Font(FONT_NAME, size)
+    return loaded
+
+
+def image(path, size=None):
+    """An image scaled to size and converted for the display, or None if it cannot be loaded"""
+    key = (path, size)
+    if key not in _images:
+        try:
+            loaded = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError):
+            loaded = None
+        if loaded is not None:
+            if size is not None:
+                loaded = pygame.transform.scale(loaded, size)
+            # Without a display there is no format to convert to yet
+            if pygame.display.get_surface() is not None:
+                loaded = loaded.convert_alpha()
+        _images[key] = loaded
+    return _images[key]
@@ -0,0 +1,36 @@
+"""
+Autopilot policies
+
+A policy looks at a Simulation and returns whether SPACE should be held
+for the next frame. Policies only read state, so they never disturb the
+terrain's random generator and a seeded run stays reproducible.
+"""
+from src.settings import *
+
+
+def idle(sim):
+    """Never fly: the baseline every other policy should beat"""
+    return False
+
+
+def hover(sim):
+    """Steer for the middle of the gap directly under the helicopter"""
+    y, y_speed, gap_top, gap_bottom = sim.observe()
+    # Aim where the helicopter will be in a few frames, not where it is
+    return y - y_speed * 6 > (gap_top + gap_bottom) / 2
+
+
+def lookahead(sim):
+    """Steer for the middle of the gap the helicopter will reach soon"""
+    player = sim.player
+    terrain = sim.terrain
+    # Look further ahead the faster the terrain moves
+    gap_top, gap_bottom = terrain.column_at(player.x + PLAYER_RADIUS + terrain.speed * 4)
+    return player.y - player.y_speed * 6 > (gap_top + gap_bottom) / 2
+
+
+POLICIES = {
+    "idle": idle,
+    "hover": hover,
+    "lookahead": lookahead,
+}
@@ -0,0 +1,218 @@
+"""
+Vectorized batch simulation
+
+Steps N independent games at once with NumPy. Every rule mirrors
+src/simulation.py operation for operation (same float arithmetic, same
+truncation, same loop structure for scrolling), so a batch game fed the
+same terrain heights as a Simulation produces identical frames.
+
+Heights come from one HeightGenerator per game, seeded the way TerrainMap
+seeds its own, so chunks are generated and checked by the same rules and
+game i plays the terrain of Simulation.reset(seeds[i]). Generators only
+run when a game needs a new column or its spacer or speed changes, and
+take() refills a generator on demand. That yields the same heights as
+TerrainMap's fill() after every update, because each chunk is seeded by
+its first column and a retune regenerates everything after the current
+column either way.
+"""
+import random
+import numpy as np
+from src.heights import HeightGenerator
+from src.settings import *
+
+
+class BatchSimulation:
+    def __init__(self, n, difficulty="Normal"):
+        self.n = n
+        self.difficulty = difficulty
+        self.total_rects = WIN_WIDTH // RECT_WIDTH
+        self.capacity = self.total_rects + 3
+        self.seeds = [0] * n  # Terrain seed of every game, as passed to Simulation.reset
+        self.generators = [HeightGenerator() for _ in range(n)]
+        
+        # Helicopter state
+        self.player_x = PLAYER_START_X
+        self.y = np.zeros(n)
+        self.y_speed = np.zeros(n)
+        self.flying = np.zeros(n, dtype=bool)
+        
+        # Terrain ring buffers, one row per game (see TerrainMap)
+        self.heights = np.zeros((n, self.capacity), dtype=np.int64)
+        self.start = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n)
+        self.last_scroll = np.zeros(n)
+        
+        # Difficulty and scoring
+        self.spacer = np.zeros(n, dtype=np.int64)
+        self.speed = np.zeros(n)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.speed_level = np.zeros(n, dtype=np.int64)
+        self.next_speed_threshold = np.zeros(n, dtype=np.int64)
+        
+        self.frame = 0
+        self.done = np.zeros(n, dtype=bool)
+    
+    @property
+    def difficulty_multiplier(self):
+        """Speed multiplier for the current difficulty"""
+        return DIFFICULTY_MULTIPLIERS[self.difficulty]
+    
+    def reset(self, seed=None, seeds=None):
+        """Start N new runs and return the first observations
+        
+        seed picks every game's terrain seed, or seeds gives them, one per
+        game as it would be passed to Simulation.reset (see self.seeds).
+        """
+        if seeds is None:
+            rng = random.Random(seed)
+            seeds = [rng.getrandbits(64) for _ in range(self.n)]
+        elif len(seeds) != self.n:
+            raise ValueError(f"{len(seeds)} seeds for {self.n} games")
+        self.seeds = list(seeds)
+        
+        self.spacer[:] = TERRAIN_VARIATION
+        self.speed[:] = INITIAL_MAP_SPEED
+        self.score[:] = 0
+        self.speed_level[:] = 0
+        self.next_speed_threshold[:] = SPEED_INCREASE_RATE
+        
+        # Same walks as TerrainMap.generate_new
+        self.start[:] = 0
+        self.x[:] = 0
+        self.last_scroll[:] = 0
+        check_speed = min(INITIAL_MAP_SPEED * self.difficulty_multiplier, MAX_SPEED)
+        for i, (seed, generator) in enumerate(zip(self.seeds, self.generators)):
+            generator.reset(random.Random(seed).getrandbits(64), TERRAIN_VARIATION, check_speed)
+            self.heights[i, :self.total_rects] = [generator.take() for _ in range(self.total_rects)]
+        self.count[:] = self.total_rects
+        
+        self.y[:] = self.heights[:, self.total_rects - 1] + 150
+        self.y_speed[:] = 0
+        self.flying[:] = False
+        self.frame = 0
+        self.done[:] = False
+        return self.observe()
+    
+    def step(self, actions):
+        """Advance every unfinished game one frame; actions[i] is SPACE held
+        
+        A single action is applied to every game.
+        """
+        live = np.flatnonzero(~self.done)
+        if len(live) == 0:
+            return self.observe(), self.score.copy(), self.done.copy()
+        
+        # Update player
+        self.flying[live] = np.broadcast_to(np.asarray(actions, dtype=bool), (self.n,))[live]
+        self.y_speed[live] += np.where(self.flying[live], GRAVITY, -GRAVITY)
+        self.y[live] -= self.y_speed[live]
+        
+        # Update terrain, then its speed and spacer for the next frame
+        self.x[live] -= self.speed[live]
+        self.last_scroll[live] = self.speed[live]
+        self._scroll(live)
+        self._update_difficulty(live)
+        self.frame += 1
+        
+        self.done[live] = self._check_swept_collision(live)
+        return self.observe(), self.score.copy(), self.done.copy()
+    
+    def _scroll(self, games):
+        """Drop columns that left the screen and generate new ones on the right"""
+        # Repeated += RECT_WIDTH (rather than one multiply) keeps the float
+        # rounding identical to TerrainMap.update
+        while True:
+            off = games[(self.count[games] > 0) & (self.x[games] + RECT_WIDTH < 0)]
+            if len(off) == 0:
+                break
+            self.start[off] = (self.start[off] + 1) % self.capacity
+            self.count[off] -= 1
+            self.x[off] += RECT_WIDTH
+            self.score[off] += 1
+        
+        while True:
+            count = self.count[games]
+            short = games[(count > 0) & (self.x[games] + (count - 1) * RECT_WIDTH < WIN_WIDTH)]
+            if len(short) == 0:
+                break
+            self.heights[short, (self.start[short] + self.count[short]) % self.capacity] = [
+                self.generators[i].take() for i in short.tolist()]
+            self.count[short] += 1
+    
+    def _update_difficulty(self, games):
+        """Vectorized TerrainMap.update_difficulty"""
+        level_up = games[self.score[games] >= self.next_speed_threshold[games]]
+        self.speed_level[level_up] += 1
+        self.next_speed_threshold[level_up] += SPEED_INCREASE_RATE * (self.speed_level[level_up] + 1)
+        
+        speed = np.minimum((INITIAL_MAP_SPEED + self.speed_level[games]) * self.difficulty_multiplier, MAX_SPEED)
+        spacer = TERRAIN_VARIATION + self.score[games] // SPACER_INCREASE_RATE
+        
+        # Only games whose spacer or speed changed can need a retune
+        changed = (speed != self.speed[games]) | (spacer != self.spacer[games])
+        self.speed[games] = speed
+        self.spacer[games] = spacer
+        for game in games[changed].tolist():
+            self.generators[game].retune(int(self.spacer[game]), float(self.speed[game]))
+    
+    def _columns(self, games, first, width):
+        """Column indices first..first+width-1 plus their x and top heights"""
+        index = first[:, None] + np.arange(width)
+        valid = index < self.count[games][:, None]
+        slots = (self.start[games][:, None] + index) % self.capacity
+        top_height = self.heights[games[:, None], slots]
+        column_x = self.x[games][:, None] + index * RECT_WIDTH
+        return valid, column_x, top_height
+    
+    def _check_swept_collision(self, games):
+        """Vectorized TerrainMap.check_swept_collision for the player rects"""
+        radius = PLAYER_RADIUS
+        left = int(self.player_x - radius)
+        top = (self.y[games] - radius).astype(np.int64)  # Truncates like int()
+        width = height = radius * 2
+        right = left + width
+        bottom = top + height
+        x = self.x[games]
+        count = self.count[games]
+        
+        # Discrete end-of-frame check over the columns under the player
+        first = np.maximum(0, np.floor_divide(left - x, RECT_WIDTH).astype(np.int64) - 1)
+        last = np.minimum(count - 1, np.floor_divide(right - x, RECT_WIDTH).astype(np.int64) + 1)
+        valid, column_x, top_height = self._columns(games, first, int((last - first).max(initial=0)) + 1)
+        column_x = column_x.astype(np.int64)
+        valid &= (first[:, None] + np.arange(valid.shape[1])) <= last[:, None]
+        overlap = valid & (left < column_x + RECT_WIDTH) & (right > column_x)
+        hit_top = (top_height > 0) & (top[:, None] < top_height) & (bottom[:, None] > 0)
+        hit_bottom = ((bottom[:, None] > top_height + TERRAIN_GAP)
+                      & (top[:, None] < top_height + TERRAIN_GAP + WIN_HEIGHT))
+        hit = (overlap & (hit_top | hit_bottom)).any(axis=1)
+        
+        # Swept check over every column passed during the frame
+        scroll = self.last_scroll[games]
+        moving = scroll > 0
+        safe_scroll = np.where(moving, scroll, 1.0)
+        first = np.maximum(0, np.floor_divide(left - scroll - x, RECT_WIDTH).astype(np.int64) - 1)
+        last = np.minimum(count - 1, np.floor_divide(right - x, RECT_WIDTH).astype(np.int64) + 1)
+        valid, column_x, top_height = self._columns(games, first, int((last - first).max(initial=0)) + 1)
+        valid &= (first[:, None] + np.arange(valid.shape[1])) <= last[:, None]
+        enter = np.maximum(0.0, (left - RECT_WIDTH - column_x) / safe_scroll[:, None])
+        leave = np.minimum(1.0, (right - column_x) / safe_scroll[:, None])
+        y_speed = self.y_speed[games][:, None]
+        top_a = top[:, None] + y_speed * enter
+        top_b = top[:, None] + y_speed * leave
+        highest = np.minimum(top_a, top_b)
+        lowest = np.maximum(top_a, top_b)
+        hit_top = (top_height > 0) & (highest < top_height) & (lowest + height > 0)
+        hit_bottom = ((lowest + height > top_height + TERRAIN_GAP)
+                      & (highest < top_height + TERRAIN_GAP + WIN_HEIGHT))
+        swept = (valid & (enter < leave) & (hit_top | hit_bottom)).any(axis=1)
+        
+        return hit | (moving & swept)
+    
+    def observe(self):
+        """Return (y, y_speed, gap_top, gap_bottom) arrays at the helicopter's x"""
+        i = np.minimum(np.maximum(0, np.floor_divide(self.player_x - self.x, RECT_WIDTH).astype(np.int64)),
+                       self.count - 1)
+        gap_top = self.heights[np.arange(self.n), (self.start + i) % self.capacity]
+        return self.y.copy(), self.y_speed.copy(), gap_top, gap_top + TERRAIN_GAP
@@ -1,88 +1,250 @@
 """
 Main game class and game loop
 """
+import os
+import random
+import time
 import pygame
+from src import assets
 from src.settings import *
 from src.player import Helicopter
 from src.terrain import Terrain
 from src.menu import Menu
+from src.simulation import Simulation
+from src.replay import ReplayRecorder
+from src.rewind import Rewind
+from src.particles import Particles, WASH, DEBRIS
+from src.textcache import TextCache, OUTLINE_WIDTH
+from src.profiler import Profiler, InputLatency
+from src.renderer import RENDERERS
+
+# Events telling us the window needs repainting (VIDEOEXPOSE on pygame 1)
+EXPOSE_EVENTS = {pygame.VIDEOEXPOSE}
+if hasattr(pygame, "WINDOWEXPOSED"):
+    EXPOSE_EVENTS.add(pygame.WINDOWEXPOSED)
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.window = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
+    def __init__(self, record_dir=None, profile=None, startup=None, renderer="pygame",
+                 low_latency=False, vsync=False, measure_latency=False, ghosts=None,
+                 rewind_seconds=REWIND_SECONDS, rewind_bytes=REWIND_MAX_BYTES, split=False):
+        # With a StartupTimer, each startup phase is timed and the breakdown
+        # is printed once the first frame is on screen
+        self.startup = startup
+        
+        # Only the modules the game uses; pygame.init() would also start
+        # audio, joysticks and more
+        pygame.display.init()
+        self.vsync = vsync
+        if vsync:
+            # SDL only syncs windows it renders through, hence SCALED
+            try:
+                self.window = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT), pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"vsync unavailable ({e}), pacing frames with the clock")
+                self.vsync = False
+        if not self.vsync:
+            self.window = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
         pygame.display.set_caption('Copter')
+        self._mark_startup("display")
+        
+        pygame.font.init()
+        self._mark_startup("font init")
         
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(FONT_NAME, FONT_SIZE)
         
-        # Game objects
+        # The simulation advances in fixed steps of 1 / TICK_RATE seconds
+        # whatever the render rate. Unsimulated time carries over between
+        # frames, and alpha is how far the drawn frame sits between the
+        # previous step and the current one.
+        self.tick_time = 1 / TICK_RATE
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        
+        # The low-latency loop waits out each frame itself and polls input
+        # at the last moment before the update. With vsync that moment is
+        # poll_budget seconds before the next vblank, and the budget adapts
+        # to how long a frame takes. Measuring latency also waits out frames
+        # itself, so SPACE events can be timed when they arrive.
+        self.low_latency = low_latency
+        self.latency = InputLatency() if measure_latency else None
+        self.poll_time = time.perf_counter()  # When input was last polled
+        self.frame_end = self.poll_time  # When the last frame finished presenting
+        self.frame_intervals = []  # Recent times between presented frames, for the refresh period
+        self.poll_budget = 1 / 120
+        self.text_cache = TextCache()
+        self.start_banner = None  # Built on first use
+        
+        # Game objects. The simulation owns the rules; the game only feeds
+        # it input and draws its player and terrain.
         self.player = Helicopter(PLAYER_START_X, PLAYER_START_Y)
         self.terrain = Terrain(self.window)
+        self.sim = Simulation(player=self.player, terrain=self.terrain)
         self.menu = Menu(self.window)
+        self.renderer = RENDERERS[renderer](self.window)
+        self.ghosts = ghosts  # Ghosts raced in every run, or None
+        self.particles = Particles()  # Rotor wash and crash debris, drawn only
+        # With split the simulation steps in a child process, and player,
+        # terrain and sim only mirror its latest snapshot for drawing
+        self.process = None
+        if split:
+            # Only split runs need shared memory and multiprocessing
+            from src.shared import SimulationProcess
+            self.process = SimulationProcess(self.terrain.capacity, self.terrain.history_columns)
+        # Snapshots of the last few seconds of the run, for rewinding and
+        # restarting the same terrain without generating it again. The
+        # snapshots are taken from the steps, so not with split.
+        self.rewind = None if split else Rewind(self.sim, rewind_seconds, rewind_bytes)
+        self._mark_startup("game objects")
         
         # Game state
         self.state = "MENU"  # MENU, SETTINGS, PLAYING, GAME_OVER
         self.running = True
         self.high_score = 0
         self.game_started = False
+        self.full_redraw = True
+        
+        # Every run gets its own seed; with a record directory each finished
+        # run is saved as a replay that re-simulates to the same score
+        self.seed = None
+        self.record_dir = record_dir
+        self.recorder = ReplayRecorder() if record_dir else None
+        
+        # With a profile path prefix every frame is timed by phase and the
+        # results are saved to <profile>.csv and <profile>.json on exit
+        self.profile = profile
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler()
+            self.profiler.install(self)
+    
+    @property
+    def font(self):
+        """HUD font, loaded the first time the HUD is drawn"""
+        return assets.font(FONT_SIZE)
     
-    def reset_game(self):
-        """Reset game to initial state"""
-        player_start_y = self.terrain.reset()
-        self.player.reset(player_start_y)
+    def _mark_startup(self, phase):
+        if self.startup is not None:
+            self.startup.mark(phase)
+    
+    def reset_game(self, seed=None):
+        """Reset game to initial state, with a fresh seed unless one is given"""
+        if seed is None and self.ghosts is not None:
+            # Race the ghosts on the terrain they flew
+            seed = self.ghosts.seed
+        self.seed = random.getrandbits(64) if seed is None else seed
+        difficulty = self.menu.difficulty if self.ghosts is None else self.ghosts.difficulty
+        if self.process is not None:
+            self.sim.difficulty = difficulty
+            self.process.reset(self.seed, difficulty)
+            self.process.read(self.sim)
+            self.terrain.restored()
+        elif self.rewind.can_restart(self.seed, difficulty):
+            # Same run again: its start is already saved
+            self.rewind.restart()
+        else:
+            self.sim.difficulty = difficulty
+            self.sim.reset(self.seed)
+            self.rewind.clear(self.seed)
+        self.particles.clear()
+        self.game_started = False
+        self.full_redraw = True
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        if self.recorder:
+            self.recorder.start(self.seed, self.sim.difficulty)
+    
+    def rewind_play(self, seconds=REWIND_STEP):
+        """Go back `seconds` of play and wait for SPACE to continue from there"""
+        self.rewind.restore(round(seconds * TICK_RATE))
+        self.particles.clear()
+        self.state = "PLAYING"
         self.game_started = False
+        self.player.set_flying(False)
+        self.full_redraw = True
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        if self.recorder:
+            self.recorder.rewind(self.sim.frame)
+    
+    def save_replay(self):
+        """Save the replay of the run that just ended"""
+        replay = self.recorder.finish(self.sim.score, self.sim.frame)
+        if replay is None:
+            return
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{replay.difficulty}-{replay.score}-{replay.seed:016x}.replay"
+        replay.save(os.path.join(self.record_dir, name))
     
     def draw_score(self):
-        """Draw score with white text and black outline for visibility"""
+        """Draw score with white text and black outline, returning the rects drawn"""
         score = self.terrain.score
+        dirty = []
         
         # Draw score at top
-        self._draw_text_with_outline(
+        dirty.append(self._draw_text_with_outline(
             f'Score: {score}',
             (20, 15),
             WHITE,
             BLACK
-        )
+        ))
         
         # Draw high score at bottom
-        self._draw_text_with_outline(
+        dirty.append(self._draw_text_with_outline(
             f'High Score: {self.high_score}',
             (20, WIN_HEIGHT - 35),
             WHITE,
             BLACK
-        )
+        ))
         
         # If game hasn't started, show instruction
         if not self.game_started:
-            instruction = "Press SPACE to start"
-            text = self.font.render(instruction, True, WHITE)
-            # Add black background for better visibility
-            padding = 10
-            bg_rect = text.get_rect(center=(WIN_WIDTH // 2, 30))
-            bg_rect.inflate_ip(padding * 2, padding)
-            pygame.draw.rect(self.window, BLACK, bg_rect)
-            pygame.draw.rect(self.window, WHITE, bg_rect, 2)
-            self.window.blit(text, text.get_rect(center=(WIN_WIDTH // 2, 30)))
+            if self.start_banner is None:
+                self.start_banner = self._render_start_banner()
+            banner_rect = self.start_banner.get_rect(center=(WIN_WIDTH // 2, 30))
+            dirty.append(self.window.blit(self.start_banner, banner_rect))
+        
+        return dirty
+    
+    def _render_start_banner(self):
+        """Render the "Press SPACE to start" box once"""
+        text = self.font.render("Press SPACE to start", True, WHITE)
+        # Add black background for better visibility
+        padding = 10
+        bg_rect = text.get_rect()
+        bg_rect.inflate_ip(padding * 2, padding)
+        banner = pygame.Surface(bg_rect.size).convert()
+        banner.fill(BLACK)
+        pygame.draw.rect(banner, WHITE, banner.get_rect(), 2)
+        banner.blit(text, text.get_rect(center=banner.get_rect().center))
+        return banner
     
     def _draw_text_with_outline(self, text, pos, color, outline_color):
-        """Draw text with outline for better visibility"""
-        # Draw outline
-        for dx, dy in [(-2, -2), (-2, 2), (2, -2), (2, 2)]:
-            outline_surface = self.font.render(text, True, outline_color)
-            self.window.blit(outline_surface, (pos[0] + dx, pos[1] + dy))
-        
-        # Draw main text
-        text_surface = self.font.render(text, True, color)
-        self.window.blit(text_surface, pos)
+        """Draw text with outline for better visibility, returning the rect drawn"""
+        # The outline is composited into one cached surface per string, so an
+        # unchanged label costs a single blit
+        surface = self.text_cache.render(self.font, text, color, outline_color)
+        return self.window.blit(surface, (pos[0] - OUTLINE_WIDTH, pos[1] - OUTLINE_WIDTH))
     
-    def handle_events(self):
+    def is_idle(self):
+        """Whether nothing animates until the next input event"""
+        if self.state == "GAME_OVER":
+            return not self.particles.count  # Once the crash debris has settled
+        return self.state != "PLAYING" or not self.game_started
+    
+    def handle_events(self, events=None):
         """Handle pygame events"""
-        for event in pygame.event.get():
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             
+            if event.type in EXPOSE_EVENTS:
+                # The window contents were lost, so cached screens must be redrawn
+                self.menu.invalidate()
+                self.full_redraw = True
+            
             if self.state == "MENU":
                 action = self.menu.handle_main_menu_event(event)
                 if action == "PLAY":
@@ -102,12 +264,23 @@ class Game:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         self.player.set_flying(True)
+                        if self.process is not None:
+                            self.process.send(True)
+                        if self.recorder:
+                            self.recorder.record(self.sim.frame, True)
                         if not self.game_started:
                             self.game_started = True
+                    elif (event.key in (pygame.K_LEFT, pygame.K_BACKSPACE) and self.game_started
+                          and self.rewind is not None):
+                        self.rewind_play()
                 
                 elif event.type == pygame.KEYUP:
                     if event.key == pygame.K_SPACE:
                         self.player.set_flying(False)
+                        if self.process is not None:
+                            self.process.send(False)
+                        if self.recorder:
+                            self.recorder.record(self.sim.frame, False)
             
             elif self.state == "GAME_OVER":
                 if event.type == pygame.KEYDOWN:
@@ -115,59 +288,191 @@ class Game:
                         # Restart game
                         self.state = "PLAYING"
                         self.reset_game()
+                    elif event.key == pygame.K_r:
+                        # Retry the same terrain
+                        self.state = "PLAYING"
+                        self.reset_game(self.seed)
+                    elif event.key in (pygame.K_LEFT, pygame.K_BACKSPACE) and self.rewind is not None:
+                        self.rewind_play()
                     elif event.key == pygame.K_ESCAPE:
                         # Return to menu
                         self.state = "MENU"
     
-    def update(self):
-        """Update game state"""
-        if self.state == "PLAYING" and self.game_started:
-            # Update player
-            self.player.update()
-            
-            # Update terrain
-            self.terrain.update()
-            self.terrain.update_difficulty()
-            
-            # Apply difficulty multiplier and cap at maximum speed
-            difficulty_mult = self.menu.get_difficulty_multiplier()
-            self.terrain.speed = min(self.terrain.speed * difficulty_mult, MAX_SPEED)
+    def update(self, elapsed=None):
+        """Advance the simulation by `elapsed` seconds (one step by default)"""
+        elapsed = self.tick_time if elapsed is None else elapsed
+        if self.state == "GAME_OVER" and self.particles.count:
+            # The debris keeps falling under the game over screen
+            self.particles.update(elapsed)
+            self.menu.invalidate()
+            return
+        if self.state != "PLAYING" or not self.game_started:
+            return
+        if self.process is not None:
+            self.update_from_process(elapsed)
+            return
+        
+        self.accumulator += elapsed
+        ticks = 0
+        while self.accumulator >= self.tick_time:
+            if ticks == MAX_TICKS_PER_FRAME:
+                # Too far behind to catch up: drop the backlog rather than
+                # make the next frame slower still
+                self.accumulator = 0.0
+                break
+            self.accumulator -= self.tick_time
+            ticks += 1
             
-            # Check collision
-            player_rect = self.player.get_rect()
-            if self.terrain.check_collision(player_rect):
+            _, score, done = self.sim.step(self.player.flying)
+            self.rewind.record()
+            if done:
+                self.update_particles(elapsed, ticks, crashed=True)
                 self.state = "GAME_OVER"
-                if self.terrain.score > self.high_score:
-                    self.high_score = self.terrain.score
+                if score > self.high_score:
+                    self.high_score = score
+                if self.recorder:
+                    self.save_replay()
+                # Show the crash exactly where it happened
+                self.accumulator = 0.0
+                self.alpha = 1.0
+                return
+        
+        self.alpha = self.accumulator / self.tick_time
+        self.update_particles(elapsed, ticks)
+    
+    def update_from_process(self, elapsed):
+        """Mirror the simulation process's latest step, which it runs on its own clock"""
+        frame = self.sim.frame
+        published = self.process.read(self.sim)
+        self.update_particles(elapsed, self.sim.frame - frame, crashed=self.sim.done)
+        if self.sim.done:
+            self.state = "GAME_OVER"
+            if self.sim.score > self.high_score:
+                self.high_score = self.sim.score
+            self.alpha = 1.0
+            return
+        # The next step is due a tick after this one was published
+        self.alpha = min(1.0, (time.perf_counter() - published) / self.tick_time)
+    
+    def update_particles(self, elapsed, steps, crashed=False):
+        """Move the particles and add rotor wash for `steps` new simulation steps"""
+        self.particles.update(elapsed)
+        player = self.player
+        if crashed:
+            self.particles.emit(DEBRIS_PARTICLES, player.x, player.y, 0, 0, DEBRIS_SPREAD,
+                                DEBRIS_LIFETIME, DEBRIS_GRAVITY, DEBRIS)
+        elif steps:
+            # Blown down under the rotor and left behind as the terrain scrolls
+            self.particles.emit(steps * WASH_PARTICLES, player.x - 10, player.y + 20,
+                                -self.terrain.speed * TICK_RATE, WASH_SPEED, WASH_SPREAD,
+                                WASH_LIFETIME, 0, WASH)
     
     def draw(self):
         """Draw current game state"""
-        if self.state == "MENU":
-            self.menu.draw_main_menu()
-        
-        elif self.state == "SETTINGS":
-            self.menu.draw_settings_menu()
-        
-        elif self.state == "PLAYING":
-            self.window.fill(BLACK)
-            self.terrain.draw()
-            self.player.draw(self.window)
-            self.draw_score()
-            pygame.display.flip()
-        
-        elif self.state == "GAME_OVER":
-            # Keep last frame visible
-            self.terrain.draw()
-            self.player.draw(self.window)
-            self.menu.draw_game_over(self.terrain.score, self.high_score)
-            pygame.display.flip()
+        self.renderer.draw(self)
+        if self.process is not None and not self.process.check_read():
+            # The snapshot was rewritten while it was drawn, so the columns
+            # painted from it may be torn: repaint them from the next one
+            self.terrain.restored()
+    
+    def refresh_period(self):
+        """Seconds between vblanks, as measured from recent presented frames"""
+        if len(self.frame_intervals) < 8:
+            return 1 / 60
+        return sorted(self.frame_intervals)[len(self.frame_intervals) // 2]
+    
+    def frame_deadline(self):
+        """When the next frame should poll its input"""
+        # FPS stays the cap, also when vsync was granted but does not block
+        deadline = self.poll_time + 1 / FPS
+        if self.vsync and self.low_latency:
+            deadline = max(deadline, self.frame_end + self.refresh_period() - self.poll_budget)
+        return deadline
+    
+    def wait_until(self, deadline, spin=False):
+        """Wait for `deadline`, returning the events that arrived meanwhile and when each did
+        
+        Events are polled at least every WAIT_SLICE seconds. With spin the
+        last SPIN_TIME seconds are spent polling, since sleeps overshoot.
+        """
+        events = []
+        arrivals = []
+        while True:
+            now = time.perf_counter()
+            arrived = pygame.event.get()
+            events += arrived
+            arrivals += [now] * len(arrived)
+            remaining = deadline - now
+            if remaining <= 0:
+                return events, arrivals
+            if not spin:
+                time.sleep(min(remaining, WAIT_SLICE))
+            elif remaining > SPIN_TIME:
+                time.sleep(min(remaining - SPIN_TIME, WAIT_SLICE))
+    
+    def frame_presented(self, now):
+        """Track the display's refresh and adapt the poll budget after a frame"""
+        if self.vsync and self.low_latency:
+            interval = now - self.frame_end
+            if interval < 0.1:
+                self.frame_intervals = self.frame_intervals[-31:] + [interval]
+            period = self.refresh_period()
+            if now - self.poll_time > self.poll_budget + period / 2:
+                # The frame missed its vblank and was shown one later: back off
+                self.poll_budget = min(self.poll_budget + period / 4, period)
+            else:
+                # Creep back towards the vblank
+                self.poll_budget = max(self.poll_budget - 0.00001, LATE_POLL_MARGIN)
+        self.frame_end = now
     
     def run(self):
         """Main game loop"""
+        paced = self.low_latency or self.vsync or self.latency is not None
         while self.running:
-            self.clock.tick(FPS)
-            self.handle_events()
-            self.update()
+            arrivals = None
+            if self.is_idle():
+                # Nothing moves until the player does something, so sleep
+                # until the next event instead of redrawing at FPS
+                events = [pygame.event.wait()] + pygame.event.get()
+                self.clock.tick()  # Don't count the wait as frame time later
+                elapsed = 0.0
+                arrivals = [time.perf_counter()] * len(events)
+            elif paced:
+                events, arrivals = self.wait_until(self.frame_deadline(), spin=self.low_latency)
+                elapsed = self.clock.tick() / 1000
+            else:
+                elapsed = self.clock.tick(FPS) / 1000
+                events = None
+            self.poll_time = time.perf_counter()
+            
+            if self.latency is not None and self.state == "PLAYING":
+                self.latency.seen(events, arrivals)
+            frame = self.sim.frame
+            self.handle_events(events)
+            self.update(elapsed)
+            if self.latency is not None:
+                if self.sim.frame != frame:
+                    self.latency.step()
+                if self.state != "PLAYING":
+                    self.latency.cancel()
             self.draw()
+            now = time.perf_counter()
+            if self.latency is not None:
+                self.latency.shown(now)
+            self.frame_presented(now)
+            if self.profiler is not None:
+                self.profiler.end_frame()
+            if self.startup is not None:
+                self.startup.mark("first frame")
+                print(self.startup.report())
+                self.startup = None
         
+        if self.profiler is not None:
+            self.profiler.uninstall()
+            self.profiler.save(self.profile)
+        if self.latency is not None:
+            print(self.latency.report())
+        if self.process is not None:
+            self.process.close()
+        assets.clear()
         pygame.quit()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Ghost racing
+
+Replays of earlier runs on the same seed and difficulty are raced as
+translucent ghost helicopters next to the live one. The terrain only
+depends on the seed, the difficulty and the frame number, so a ghost needs
+nothing but its y at every frame. Those trajectories are simulated for all
+ghosts at once with NumPy when the replays load, and every frame the ghosts
+still flying are drawn with one blits() call of a single shared sprite.
+"""
+from collections import Counter
+import numpy as np
+import pygame
+from src import assets
+from src.replay import Replay, ReplayError
+from src.settings import *
+from src.simulation import Simulation
+
+
+def trajectories(replays, start_y):
+    """y of every replay's helicopter after each step, one column per replay
+    
+    Row f holds y after f steps. Rows after a replay's last frame are NaN.
+    The sums are accumulated in the same order as HelicopterBody.update, so
+    the result matches a step-by-step simulation exactly.
+    """
+    length = max(replay.frames for replay in replays) + 1
+    y = np.full((length, len(replays)), np.nan)
+    steps = np.arange(length - 1)
+    for i, replay in enumerate(replays):
+        # SPACE state during every step: that of the last event at or before it
+        if replay.events:
+            frames, pressed = zip(*replay.events)
+            last = np.searchsorted(frames, steps[:replay.frames], side="right") - 1
+            flying = np.where(last >= 0, np.asarray(pressed)[last], False)
+        else:
+            flying = np.zeros(replay.frames, dtype=bool)
+        y_speed = np.cumsum(np.where(flying, GRAVITY, -GRAVITY))
+        y[:replay.frames + 1, i] = np.cumsum(np.concatenate(([start_y], -y_speed)))
+    return y
+
+
+class Ghosts:
+    def __init__(self, replays):
+        if not replays:
+            raise ValueError("no replays to race")
+        self.seed = replays[0].seed
+        self.difficulty = replays[0].difficulty
+        self.count = len(replays)
+        start_y = Simulation(self.difficulty).reset(self.seed)[0]
+        self.y = trajectories(replays, start_y)
+        self.left = PLAYER_START_X - 40  # Sprite offset as in Helicopter.draw
+        self._sprite = None
+    
+    @classmethod
+    def load(cls, paths):
+        """Ghosts of the replays in paths that share the most common seed and difficulty"""
+        replays = []
+        for path in paths:
+            try:
+                replays.append(Replay.load(path))
+            except (OSError, ReplayError) as e:
+                print(f"{path}: skipped ({e})")
+        if not replays:
+            raise ValueError("no replays to race")
+        race = Counter((replay.seed, replay.difficulty) for replay in replays).most_common(1)[0][0]
+        return cls([replay for replay in replays if (replay.seed, replay.difficulty) == race])
+    
+    @property
+    def sprite(self):
+        """The translucent sprite every ghost shares, built on first draw"""
+        if self._sprite is None:
+            image = assets.image(HELICOPTER_IMAGE, HELICOPTER_SIZE)
+            if image is None:
+                image = pygame.Surface(HELICOPTER_SIZE, pygame.SRCALPHA)
+                pygame.draw.circle(image, WHITE, (40, 30), PLAYER_RADIUS)
+            sprite = image.copy()
+            # Scale the per-pixel alpha down once, instead of blending per blit
+            sprite.fill((255, 255, 255, GHOST_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+            self._sprite = sprite.convert_alpha()
+        return self._sprite
+    
+    def positions(self, frame, alpha=1.0):
+        """y of every ghost still flying, alpha of the way from step frame - 1 to frame"""
+        if frame >= len(self.y):
+            return np.empty(0)
+        previous = self.y[max(frame - 1, 0)]
+        y = previous + (self.y[frame] - previous) * alpha
+        return y[~np.isnan(y)]
+    
+    def draw(self, window, frame, alpha=1.0):
+        """Draw the ghosts at a simulation frame, returning the rect they cover (or None)"""
+        y = self.positions(frame, alpha)
+        if not len(y):
+            return None
+        sprite = self.sprite
+        top = y - 30
+        window.blits([(sprite, (self.left, value)) for value in top.tolist()], doreturn=False)
+        return pygame.Rect(self.left, int(top.min()), sprite.get_width(),
+                           int(top.max() - top.min()) + sprite.get_height() + 1)
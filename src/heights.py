@@ -0,0 +1,126 @@
+"""
+Chunked terrain height generation
+
+Terrain tops follow a bounded random walk: every column's top is drawn
+uniformly from [previous - spacer, previous + spacer] clamped to [0, 300].
+HeightGenerator produces that walk a chunk at a time with NumPy and keeps
+a lookahead buffer filled, so scrolling only pops precomputed heights.
+
+Each chunk draws from its own generator seeded by (seed, first column,
+spacer). A run is therefore reproducible from its seed however the buffer
+happens to be refilled, and heights generated ahead with an old spacer can
+be thrown away and regenerated when the spacer changes.
+
+Every chunk is checked at the current terrain speed before it is used (see
+reachability.py). A chunk the check finds no input can survive is redrawn,
+and after TERRAIN_CHECK_ATTEMPTS failures it is regenerated with an ever
+smaller spacer, down to flat terrain. The check only rules out impossible
+chunks; passing it does not prove a chunk can be flown through.
+"""
+import numpy as np
+from src.reachability import ReachabilityCheck
+from src.settings import *
+
+MAX_TOP_HEIGHT = 300
+CONTEXT_COLUMNS = 16  # Columns before a chunk included in its survivability check
+
+
+def bounded_walk(rng, previous, spacer, length):
+    """`length` walk steps after `previous`, each uniform over the clamped window
+    
+    Steps are drawn uniformly from [-spacer, spacer] and accumulated in one
+    go. The first height that leaves [0, MAX_TOP_HEIGHT] is redrawn from the
+    clamped window (what rejecting out of range steps would give) and the
+    rest of the walk is re-accumulated from there, so the result has
+    exactly the distribution of the clamped per-column draws.
+    """
+    steps = rng.integers(-spacer, spacer + 1, size=length)
+    heights = previous + np.cumsum(steps)
+    i = 0
+    while True:
+        outside = np.flatnonzero((heights[i:] < 0) | (heights[i:] > MAX_TOP_HEIGHT))
+        if len(outside) == 0:
+            return heights
+        i += outside[0]
+        before = heights[i - 1] if i else previous
+        heights[i] = rng.integers(max(0, before - spacer), min(MAX_TOP_HEIGHT, before + spacer) + 1)
+        heights[i + 1:] = heights[i] + np.cumsum(steps[i + 1:])
+        i += 1
+
+
+class HeightGenerator:
+    def __init__(self, chunk_size=TERRAIN_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.seed = 0
+        self.spacer = TERRAIN_VARIATION
+        self.speed = INITIAL_MAP_SPEED  # Terrain speed chunks are checked at
+        self.check = ReachabilityCheck()
+        self.rejected = 0  # Chunks redrawn or repaired since reset
+        
+        # The last CONTEXT_COLUMNS heights handed out, then the lookahead
+        self.buffer = []
+        self.pos = 0  # Next height in buffer to hand out
+        self.taken = 0  # Heights handed out since reset (the next column's index)
+        self.version = 0  # Changes whenever the buffer's contents do, not when pos moves
+    
+    def reset(self, seed, spacer, speed):
+        """Start a new walk from a height drawn uniformly over [0, 300], checked at speed"""
+        self.seed = seed
+        self.spacer = spacer
+        self.speed = speed
+        self.buffer = []
+        self.pos = 0
+        self.taken = 0
+        self.rejected = 0
+        self.version += 1
+        self.fill()
+    
+    def retune(self, spacer, speed):
+        """Change the walk's spacer and the speed chunks are checked at, from the next height on"""
+        if spacer == self.spacer and speed == self.speed:
+            return
+        self.spacer = spacer
+        self.speed = speed
+        # Heights generated ahead used the old spacer or were checked at the
+        # old speed: regenerate them
+        del self.buffer[self.pos:]
+        self.version += 1
+        self.fill()
+    
+    def fill(self):
+        """Top the lookahead buffer up to at least one chunk"""
+        remaining = len(self.buffer) - self.pos
+        if remaining >= self.chunk_size:
+            return
+        chunk = self.generate(self.taken + remaining, self.buffer[-CONTEXT_COLUMNS:])
+        keep = max(0, self.pos - CONTEXT_COLUMNS)
+        self.buffer = self.buffer[keep:] + chunk
+        self.pos -= keep
+        self.version += 1
+    
+    def generate(self, first_column, context):
+        """Heights of columns first_column.. as a list, continuing the walk in context"""
+        rng = np.random.default_rng((self.seed, first_column, self.spacer))
+        previous = context[-1] if context else int(rng.integers(0, MAX_TOP_HEIGHT + 1))
+        chunk = bounded_walk(rng, previous, self.spacer, self.chunk_size)
+        
+        # Redraw chunks nothing can survive, then repair by narrowing the walk
+        attempt = 0
+        spacer = self.spacer
+        while spacer > 0 and not self.check.survivable(np.concatenate((context, chunk)), self.speed):
+            self.rejected += 1
+            attempt += 1
+            if attempt >= TERRAIN_CHECK_ATTEMPTS:
+                spacer //= 2
+            rng = np.random.default_rng((self.seed, first_column, self.spacer, attempt))
+            chunk = bounded_walk(rng, previous, spacer, self.chunk_size)
+        return chunk.tolist()
+    
+    def take(self):
+        """Next height of the walk"""
+        if self.pos == len(self.buffer):
+            self.fill()
+        height = self.buffer[self.pos]
+        self.pos += 1
+        self.taken += 1
+        return height
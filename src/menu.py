@@ -2,18 +2,21 @@
 Menu system for the game
 """
 import pygame
+from src import assets
 from src.settings import *
+from src.textcache import TextCache
 
 
 class Button:
-    def __init__(self, x, y, width, height, text, font):
+    def __init__(self, x, y, width, height, text, font_size):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
-        self.font = font
+        self.font_size = font_size
         self.color = DARK_GREEN
         self.hover_color = GREEN
         self.text_color = WHITE
         self.hovered = False
+        self.text_surface = None  # Rendered on first draw
     
     def draw(self, window):
         """Draw button"""
@@ -21,9 +24,11 @@ class Button:
         pygame.draw.rect(window, color, self.rect)
         pygame.draw.rect(window, WHITE, self.rect, 3)
         
-        text_surface = self.font.render(self.text, True, self.text_color)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        window.blit(text_surface, text_rect)
+        if self.text_surface is None:
+            font = assets.font(self.font_size)
+            self.text_surface = font.render(self.text, True, self.text_color)
+        text_rect = self.text_surface.get_rect(center=self.rect.center)
+        window.blit(self.text_surface, text_rect)
     
     def check_hover(self, pos):
         """Check if mouse is hovering over button"""
@@ -38,35 +43,62 @@ class Button:
 class Menu:
     def __init__(self, window):
         self.window = window
-        self.title_font = pygame.font.Font(FONT_NAME, TITLE_FONT_SIZE)
-        self.menu_font = pygame.font.Font(FONT_NAME, MENU_FONT_SIZE)
-        self.font = pygame.font.Font(FONT_NAME, FONT_SIZE)
         
         # Main menu buttons
         button_width = 300
         button_height = 60
         button_x = WIN_WIDTH // 2 - button_width // 2
         
-        self.play_button = Button(button_x, 250, button_width, button_height, "Play", self.menu_font)
-        self.settings_button = Button(button_x, 330, button_width, button_height, "Settings", self.menu_font)
-        self.quit_button = Button(button_x, 410, button_width, button_height, "Quit", self.menu_font)
+        self.play_button = Button(button_x, 250, button_width, button_height, "Play", MENU_FONT_SIZE)
+        self.settings_button = Button(button_x, 330, button_width, button_height, "Settings", MENU_FONT_SIZE)
+        self.quit_button = Button(button_x, 410, button_width, button_height, "Quit", MENU_FONT_SIZE)
         
         # Settings menu buttons
-        self.back_button = Button(button_x, 450, button_width, button_height, "Back", self.menu_font)
+        self.back_button = Button(button_x, 450, button_width, button_height, "Back", MENU_FONT_SIZE)
         
         # Settings values
         self.difficulty = "Normal"  # Easy, Normal, Hard
         self.difficulties = ["Easy", "Normal", "Hard"]
         self.difficulty_index = 1
+        
+        # Menu screens are static, so each one is composed and flipped only
+        # when what it shows changes. `drawn` describes what is on screen now.
+        self.text_cache = TextCache()
+        self.overlay = None  # Game over dimming surface, built on first use
+        self.drawn = None
+    
+    # Fonts are loaded the first time a screen needs them
+    @property
+    def title_font(self):
+        return assets.font(TITLE_FONT_SIZE)
+    
+    @property
+    def menu_font(self):
+        return assets.font(MENU_FONT_SIZE)
+    
+    @property
+    def font(self):
+        return assets.font(FONT_SIZE)
+    
+    def invalidate(self):
+        """Force the next draw_* call to redraw (the window was drawn over)"""
+        self.drawn = None
+    
+    def _blit_text(self, font, text, color, **position):
+        """Blit cached text positioned like Surface.get_rect(**position)"""
+        surface = self.text_cache.render(font, text, color)
+        self.window.blit(surface, surface.get_rect(**position))
     
     def draw_main_menu(self):
-        """Draw main menu"""
+        """Draw main menu if it changed, returning whether it was drawn"""
+        view = ("MENU", self.play_button.hovered, self.settings_button.hovered, self.quit_button.hovered)
+        if view == self.drawn:
+            return False
+        
         self.window.fill(BLACK)
         
         # Draw title
-        title = self.title_font.render("COPTER", True, GREEN)
-        title_rect = title.get_rect(center=(WIN_WIDTH // 2, 150))
-        self.window.blit(title, title_rect)
+        self._blit_text(self.title_font, "COPTER", GREEN, center=(WIN_WIDTH // 2, 150))
         
         # Draw buttons
         self.play_button.draw(self.window)
@@ -74,69 +106,76 @@ class Menu:
         self.quit_button.draw(self.window)
         
         pygame.display.flip()
+        self.drawn = view
+        return True
     
     def draw_settings_menu(self):
-        """Draw settings menu"""
+        """Draw settings menu if it changed, returning whether it was drawn"""
+        view = ("SETTINGS", self.difficulty, self.back_button.hovered)
+        if view == self.drawn:
+            return False
+        
         self.window.fill(BLACK)
         
         # Draw title
-        title = self.menu_font.render("Settings", True, GREEN)
-        title_rect = title.get_rect(center=(WIN_WIDTH // 2, 100))
-        self.window.blit(title, title_rect)
+        self._blit_text(self.menu_font, "Settings", GREEN, center=(WIN_WIDTH // 2, 100))
         
         # Draw difficulty setting
-        diff_text = self.font.render("Difficulty:", True, WHITE)
-        self.window.blit(diff_text, (WIN_WIDTH // 2 - 150, 250))
-        
-        diff_value = self.menu_font.render(self.difficulty, True, GREEN)
-        diff_value_rect = diff_value.get_rect(center=(WIN_WIDTH // 2, 300))
-        self.window.blit(diff_value, diff_value_rect)
+        self._blit_text(self.font, "Difficulty:", WHITE, topleft=(WIN_WIDTH // 2 - 150, 250))
+        self._blit_text(self.menu_font, self.difficulty, GREEN, center=(WIN_WIDTH // 2, 300))
         
         # Draw arrows for difficulty selection
-        left_arrow = self.menu_font.render("<", True, WHITE)
-        right_arrow = self.menu_font.render(">", True, WHITE)
-        self.window.blit(left_arrow, (WIN_WIDTH // 2 - 150, 280))
-        self.window.blit(right_arrow, (WIN_WIDTH // 2 + 120, 280))
+        self._blit_text(self.menu_font, "<", WHITE, topleft=(WIN_WIDTH // 2 - 150, 280))
+        self._blit_text(self.menu_font, ">", WHITE, topleft=(WIN_WIDTH // 2 + 120, 280))
         
         # Instructions
-        instructions = self.font.render("Use arrow keys or click arrows to change difficulty", True, GRAY)
-        inst_rect = instructions.get_rect(center=(WIN_WIDTH // 2, 370))
-        self.window.blit(instructions, inst_rect)
+        self._blit_text(self.font, "Use arrow keys or click arrows to change difficulty", GRAY,
+                        center=(WIN_WIDTH // 2, 370))
         
         self.back_button.draw(self.window)
         
         pygame.display.flip()
+        self.drawn = view
+        return True
     
-    def draw_game_over(self, score, high_score):
-        """Draw game over overlay"""
+    def draw_game_over(self, score, high_score, draw_background, draw_effects=None, rewind=True):
+        """Draw game over overlay if it changed, returning whether it was drawn
+        
+        draw_background is called first to paint the final game frame under
+        the overlay, and draw_effects (if given) paints over the overlay.
+        rewind says whether LEFT can rewind the run.
+        """
+        view = ("GAME_OVER", score, high_score)
+        if view == self.drawn:
+            return False
+        
+        draw_background()
+        
         # Semi-transparent overlay
-        overlay = pygame.Surface((WIN_WIDTH, WIN_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        self.window.blit(overlay, (0, 0))
+        if self.overlay is None:
+            self.overlay = pygame.Surface((WIN_WIDTH, WIN_HEIGHT)).convert()
+            self.overlay.set_alpha(180)
+            self.overlay.fill(BLACK)
+        self.window.blit(self.overlay, (0, 0))
+        if draw_effects is not None:
+            draw_effects()
         
         # Game over text
-        game_over_text = self.title_font.render("GAME OVER", True, WHITE)
-        game_over_rect = game_over_text.get_rect(center=(WIN_WIDTH // 2, 200))
-        self.window.blit(game_over_text, game_over_rect)
+        self._blit_text(self.title_font, "GAME OVER", WHITE, center=(WIN_WIDTH // 2, 200))
         
         # Score
-        score_text = self.menu_font.render(f"Score: {score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(WIN_WIDTH // 2, 280))
-        self.window.blit(score_text, score_rect)
-        
-        high_score_text = self.menu_font.render(f"High Score: {high_score}", True, GREEN)
-        high_rect = high_score_text.get_rect(center=(WIN_WIDTH // 2, 340))
-        self.window.blit(high_score_text, high_rect)
+        self._blit_text(self.menu_font, f"Score: {score}", WHITE, center=(WIN_WIDTH // 2, 280))
+        self._blit_text(self.menu_font, f"High Score: {high_score}", GREEN, center=(WIN_WIDTH // 2, 340))
         
         # Instructions
-        restart_text = self.font.render("Press ENTER to restart", True, WHITE)
-        restart_rect = restart_text.get_rect(center=(WIN_WIDTH // 2, 420))
-        self.window.blit(restart_text, restart_rect)
+        self._blit_text(self.font, "Press ENTER to restart", WHITE, center=(WIN_WIDTH // 2, 420))
+        retry = "Press R to retry this terrain, LEFT to rewind" if rewind else "Press R to retry this terrain"
+        self._blit_text(self.font, retry, WHITE, center=(WIN_WIDTH // 2, 450))
+        self._blit_text(self.font, "Press ESC for main menu", WHITE, center=(WIN_WIDTH // 2, 480))
         
-        menu_text = self.font.render("Press ESC for main menu", True, WHITE)
-        menu_rect = menu_text.get_rect(center=(WIN_WIDTH // 2, 450))
-        self.window.blit(menu_text, menu_rect)
+        pygame.display.flip()
+        self.drawn = view
+        return True
     
     def handle_main_menu_event(self, event):
         """Handle main menu events, returns action"""
@@ -190,9 +229,4 @@ class Menu:
     
     def get_difficulty_multiplier(self):
         """Get speed multiplier based on difficulty"""
-        if self.difficulty == "Easy":
-            return 0.7
-        elif self.difficulty == "Normal":
-            return 1.0
-        else:  # Hard
-            return 1.5
+        return DIFFICULTY_MULTIPLIERS[self.difficulty]
@@ -0,0 +1,194 @@
+"""
+Particle effects
+
+Rotor wash trails the helicopter, and a burst of debris
+marks a crash. Particles never touch the simulation, so they cannot change
+a run or its replay.
+
+Every particle is one column of a preallocated float32 array with a row
+per field, and the live particles are packed at the front. Each frame all
+of them move in a few vectorized operations. Dead ones are dropped by
+compressing the live columns into a spare array of the same shape and
+swapping the two, so moving and recycling particles allocates nothing.
+Drawing writes every particle into the window's pixels with one scatter
+per pixel of the particle's square.
+
+The number of live particles never exceeds PARTICLE_CAPACITY and a frame
+never spawns more than PARTICLE_SPAWN_BUDGET, so the cost per frame is
+bounded. When the budget runs out the effects get thinner instead of the
+frame getting slower.
+"""
+import numpy as np
+import pygame
+from src.settings import *
+
+# Rows of the particle array, suffixed so they cannot shadow settings such as GRAVITY
+X_ROW, Y_ROW, VX_ROW, VY_ROW, LIFE_ROW, SPAN_ROW, GRAVITY_ROW, PALETTE_ROW = range(8)
+FIELDS = 8
+
+# Palettes, as a particle fades from its first color to its last
+WASH, DEBRIS = range(2)
+PALETTES = (
+    ((200, 200, 200), (120, 120, 120), (50, 50, 50)),
+    ((255, 255, 160), (255, 170, 40), (200, 60, 20), (80, 20, 10)),
+)
+SHADES = 8
+
+
+class Particles:
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.data = np.zeros((FIELDS, capacity), dtype=np.float32)
+        self.spare = np.zeros_like(self.data)  # Compaction target, swapped with data
+        self.count = 0  # Live particles, packed at the front of data
+        self.budget = PARTICLE_SPAWN_BUDGET  # Spawns left this frame
+        
+        # Scratch space, so neither update nor emit allocates
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.inside = np.zeros(capacity, dtype=bool)
+        self.noise = np.zeros(capacity, dtype=np.float32)
+        self.random = np.random.default_rng(seed)
+        
+        self.pixel_x = np.zeros(capacity, dtype=np.intp)
+        self.pixel_y = np.zeros(capacity, dtype=np.intp)
+        self.shade = np.zeros(capacity, dtype=np.intp)
+        self.pixel_colors = np.zeros(capacity, dtype=np.int64)
+        self.colors = None  # Palette shades in the window's pixel format, built on first draw
+    
+    def clear(self):
+        """Remove every particle"""
+        self.count = 0
+    
+    def emit(self, count, x, y, vx, vy, spread, life, gravity, palette):
+        """Add up to count particles at (x, y), returning how many were added
+        
+        Velocities scatter around (vx, vy) in pixels per second by up to
+        spread in every direction, and lifetimes from half to one and a half
+        times life seconds.
+        """
+        count = min(count, self.budget, self.capacity - self.count)
+        if count <= 0:
+            return 0
+        block = self.data[:, self.count:self.count + count]
+        noise = self.noise[:count]
+        
+        # Direction, then speed
+        self.random.random(dtype=np.float32, out=noise)
+        noise *= 2 * np.pi
+        np.cos(noise, out=block[VX_ROW])
+        np.sin(noise, out=block[VY_ROW])
+        self.random.random(dtype=np.float32, out=noise)
+        noise *= spread
+        block[VX_ROW] *= noise
+        block[VY_ROW] *= noise
+        block[VX_ROW] += vx
+        block[VY_ROW] += vy
+        
+        self.random.random(dtype=np.float32, out=noise)
+        noise += 0.5
+        noise *= life
+        block[LIFE_ROW] = noise
+        block[SPAN_ROW] = noise
+        block[X_ROW] = x
+        block[Y_ROW] = y
+        block[GRAVITY_ROW] = gravity
+        block[PALETTE_ROW] = palette * SHADES  # First shade of the palette
+        
+        self.count += count
+        self.budget -= count
+        return count
+    
+    def update(self, elapsed):
+        """Move every particle by elapsed seconds and drop the dead and off-screen ones"""
+        self.budget = PARTICLE_SPAWN_BUDGET
+        count = self.count
+        if not count:
+            return
+        data = self.data[:, :count]
+        step = self.noise[:count]
+        
+        np.multiply(data[GRAVITY_ROW], elapsed, out=step)
+        data[VY_ROW] += step
+        np.multiply(data[VX_ROW], elapsed, out=step)
+        data[X_ROW] += step
+        np.multiply(data[VY_ROW], elapsed, out=step)
+        data[Y_ROW] += step
+        data[LIFE_ROW] -= elapsed
+        
+        alive = self.alive[:count]
+        inside = self.inside[:count]
+        np.greater(data[LIFE_ROW], 0, out=alive)
+        for row, limit in ((X_ROW, WIN_WIDTH), (Y_ROW, WIN_HEIGHT)):
+            np.greater_equal(data[row], 0, out=inside)
+            alive &= inside
+            np.less(data[row], limit - PARTICLE_SIZE, out=inside)
+            alive &= inside
+        
+        live = int(np.count_nonzero(alive))
+        if live < count:
+            # Pack the survivors into the spare array and make it current
+            np.compress(alive, data, axis=1, out=self.spare[:, :live])
+            self.data, self.spare = self.spare, self.data
+            self.count = live
+    
+    def draw(self, window):
+        """Draw every particle, returning the rect they cover (or None)"""
+        count = self.count
+        if not count:
+            return None
+        if self.colors is None:
+            self.colors = self._palette_colors(window)
+        data = self.data[:, :count]
+        x = self.pixel_x[:count]
+        y = self.pixel_y[:count]
+        shade = self.shade[:count]
+        np.copyto(x, data[X_ROW], casting="unsafe")
+        np.copyto(y, data[Y_ROW], casting="unsafe")
+        
+        # Fade from the palette's first shade to its last over the lifetime
+        step = self.noise[:count]
+        np.divide(data[LIFE_ROW], data[SPAN_ROW], out=step)
+        np.subtract(1, step, out=step)
+        step *= SHADES - 1
+        np.clip(step, 0, SHADES - 1, out=step)
+        step += data[PALETTE_ROW]
+        np.copyto(shade, step, casting="unsafe")
+        colors = np.take(self.colors, shade, out=self.pixel_colors[:count])
+        
+        # Particles emitted since the last update can sit off the window,
+        # where they would index past its pixels or wrap around to the far side
+        inside = self.inside[:count]
+        bound = self.alive[:count]
+        inside.fill(True)
+        for pixel, limit in ((x, window.get_width()), (y, window.get_height())):
+            np.greater_equal(pixel, 0, out=bound)
+            inside &= bound
+            np.less_equal(pixel, limit - PARTICLE_SIZE, out=bound)
+            inside &= bound
+        if not inside.all():
+            x = x[inside]
+            y = y[inside]
+            colors = colors[inside]
+            if not len(x):
+                return None
+        
+        pixels = pygame.surfarray.pixels2d(window)
+        for dx in range(PARTICLE_SIZE):
+            for dy in range(PARTICLE_SIZE):
+                pixels[x + dx, y + dy] = colors
+        del pixels  # Unlock the window
+        
+        left = int(x.min())
+        top = int(y.min())
+        return pygame.Rect(left, top, int(x.max()) - left + PARTICLE_SIZE, int(y.max()) - top + PARTICLE_SIZE)
+    
+    @staticmethod
+    def _palette_colors(window):
+        """Every palette's shades mapped to the window's pixel format, palette-major"""
+        colors = []
+        for palette in PALETTES:
+            stops = np.array(palette, dtype=float)
+            position = np.linspace(0, len(palette) - 1, SHADES)
+            shades = np.column_stack([np.interp(position, np.arange(len(palette)), stops[:, i]) for i in range(3)])
+            colors += [window.map_rgb(tuple(int(value) for value in rgb)) for rgb in shades]
+        return np.array(colors, dtype=np.int64)
@@ -2,57 +2,33 @@
 Player (Helicopter) class
 """
 import pygame
+from src import assets
 from src.settings import *
+from src.simulation import HelicopterBody
 
 
-class Helicopter:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.y_speed = 0
-        self.flying = False
-        self.radius = PLAYER_RADIUS
-        
-        # Load and scale helicopter image
-        try:
-            image = pygame.image.load(HELICOPTER_IMAGE)
-            self.image = pygame.transform.scale(image, HELICOPTER_SIZE)
-        except pygame.error:
-            # If image not found, use None (will draw circle only)
-            self.image = None
-    
-    def reset(self, y=None):
-        """Reset helicopter to starting position"""
-        self.x = PLAYER_START_X
-        if y is not None:
-            self.y = y
-        else:
-            self.y = PLAYER_START_Y
-        self.y_speed = 0
-        self.flying = False
-    
-    def set_flying(self, flying):
-        """Set flying state"""
-        self.flying = flying
+class Helicopter(HelicopterBody):
+    @property
+    def image(self):
+        """Helicopter sprite, loaded on first draw (None if missing: circle only)"""
+        return assets.image(HELICOPTER_IMAGE, HELICOPTER_SIZE)
     
-    def update(self):
-        """Update helicopter position"""
-        if self.flying:
-            self.y_speed += GRAVITY
-        else:
-            self.y_speed -= GRAVITY
-        self.y -= self.y_speed
-    
-    def draw(self, window):
-        """Draw helicopter on window"""
+    def draw(self, window, alpha=1.0):
+        """Draw helicopter on window, returning the rect drawn
+        
+        alpha places the helicopter between its previous (0) and current (1)
+        simulated position.
+        """
+        y = self.previous_y + (self.y - self.previous_y) * alpha
+        
         # Draw circle hitbox
-        circle = pygame.draw.circle(window, BLACK, (int(self.x), int(self.y)), self.radius)
+        rect = pygame.draw.circle(window, BLACK, (int(self.x), int(y)), self.radius)
         
         # Draw helicopter image if available
         if self.image:
-            window.blit(self.image, (self.x - 40, self.y - 30))
+            rect = rect.union(window.blit(self.image, (self.x - 40, y - 30)))
         
-        return circle
+        return rect
     
     def get_rect(self):
         """Get collision rectangle for the helicopter"""
@@ -0,0 +1,254 @@
+"""
+Frame-phase profiler
+
+Times where each frame goes: event handling, the simulation update split
+into player, terrain, difficulty and collision, drawing and the display
+flip. Phases are timed exclusively, so a phase never includes the time of
+the phases nested inside it (update does not count player, draw does not
+count flip).
+
+The profiler works by wrapping methods on the live objects, so a game that
+never creates one pays nothing for it.
+
+InputLatency measures how long each SPACE press or release takes from
+arriving to the first frame on screen that reflects it.
+"""
+import json
+import time
+from array import array
+from collections import Counter
+import pygame
+from src.settings import *
+
+PHASES = ("events", "update", "player", "terrain", "difficulty", "collision", "draw", "overlay", "flip")
+PERCENTILES = (50, 95, 99)
+
+
+class StartupTimer:
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.last = self.started
+        self.phases = []  # (phase, seconds) in order
+    
+    def mark(self, phase):
+        """End a phase that started at the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+    
+    def report(self):
+        """Startup breakdown in milliseconds, one phase per line"""
+        lines = [f"{phase:<14}{seconds * 1000:>8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'total':<14}{(self.last - self.started) * 1000:>8.1f} ms")
+        return "\n".join(lines)
+
+
+class InputLatency:
+    def __init__(self):
+        self.waiting = []  # Arrival times of inputs no simulation step has used yet
+        self.stepped = []  # Arrival times of inputs used by a step, not on screen yet
+        self.samples = array('d')  # Milliseconds from arrival to the frame showing it
+    
+    def seen(self, events, arrivals):
+        """Note the SPACE presses and releases among events, arrived at the given times"""
+        for event, arrived in zip(events, arrivals):
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key == pygame.K_SPACE:
+                self.waiting.append(arrived)
+    
+    def step(self):
+        """The simulation stepped with every input seen so far"""
+        self.stepped += self.waiting
+        self.waiting = []
+    
+    def shown(self, now):
+        """A frame reflecting every stepped input finished presenting at `now`"""
+        self.samples.extend((now - arrived) * 1000 for arrived in self.stepped)
+        self.stepped = []
+    
+    def cancel(self):
+        """Forget inputs that no frame will reflect, because the run ended"""
+        self.waiting = []
+    
+    def report(self, bucket=LATENCY_BUCKET_MS):
+        """Histogram and percentiles of the measured latencies, as text"""
+        if not self.samples:
+            return "input latency: no SPACE presses measured"
+        values = sorted(self.samples)
+        # Outliers share one last bucket rather than stretching the histogram
+        counts = Counter(min(int(value // bucket), LATENCY_BUCKETS) for value in values)
+        peak = max(counts.values())
+        lines = [f"input latency of {len(values)} SPACE presses/releases (ms)"]
+        for index in range(min(counts), max(counts) + 1):
+            count = counts.get(index, 0)
+            if index == LATENCY_BUCKETS:
+                label = f"{index * bucket}+"
+            else:
+                label = f"{index * bucket}-{(index + 1) * bucket}"
+            lines.append(f"{label:>9} {count:>6} {'#' * round(count / peak * 40)}")
+        lines.append("  ".join(f"p{p} {values[min(len(values) - 1, len(values) * p // 100)]:.1f}"
+                               for p in PERCENTILES) + f"  max {values[-1]:.1f}")
+        return "\n".join(lines)
+
+
+class Profiler:
+    def __init__(self, history=PROFILE_HISTORY):
+        self.history = history
+        # One ring of per-frame milliseconds per phase, plus the whole frame
+        self.samples = {phase: array('d', [0.0] * history) for phase in PHASES + ("frame",)}
+        self.frames = 0  # Frames recorded in total; the ring holds the last `history`
+        
+        self.current = dict.fromkeys(PHASES, 0.0)  # Seconds spent in this frame so far
+        self.stack = []  # Child time of every phase currently running
+        self.frame_start = time.perf_counter()
+        self.patched = []  # (owner, name, original) to undo on uninstall
+        
+        self.font = None
+        self.overlay = None
+        self.overlay_time = 0.0
+    
+    def timer(self, function, phase):
+        """Return function wrapped to add its exclusive time to `phase`"""
+        def timed(*args, **kwargs):
+            self.stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = self.stack.pop()
+                self.current[phase] += elapsed - children
+                if self.stack:
+                    self.stack[-1] += elapsed
+        return timed
+    
+    def wrap(self, owner, name, phase):
+        """Time every call of owner.<name> as `phase`"""
+        self.patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, self.timer(getattr(owner, name), phase))
+    
+    def install(self, game):
+        """Instrument a Game and the display calls it makes"""
+        self.wrap(game, "handle_events", "events")
+        self.wrap(game, "update", "update")
+        self.wrap(game, "draw", "draw")
+        self.wrap(game.player, "update", "player")
+        self.wrap(game.terrain, "update", "terrain")
+        self.wrap(game.terrain, "update_difficulty", "difficulty")
+        self.wrap(game.terrain, "check_swept_collision", "collision")
+        
+        # Looking up a system font can take a while, so do it before timing
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.font = pygame.font.SysFont("monospace", PROFILE_FONT_SIZE)
+        
+        # Menus flip the display themselves, so the module functions are
+        # wrapped rather than Game's calls. The overlay goes on top of
+        # whatever is about to be shown.
+        timed_flip = self.timer(pygame.display.flip, "flip")
+        timed_update = self.timer(pygame.display.update, "flip")
+        draw_overlay = self.timer(self.draw_overlay, "overlay")
+        
+        def flip():
+            draw_overlay()
+            timed_flip()
+        
+        def update(rects=None):
+            overlay_rect = draw_overlay()
+            if rects is None:
+                return timed_update()
+            if overlay_rect is not None:
+                rects = list(rects) + [overlay_rect]
+            return timed_update(rects)
+        
+        self.patched.append((pygame.display, "flip", pygame.display.flip))
+        self.patched.append((pygame.display, "update", pygame.display.update))
+        pygame.display.flip = flip
+        pygame.display.update = update
+    
+    def uninstall(self):
+        """Put every wrapped method back"""
+        while self.patched:
+            owner, name, original = self.patched.pop()
+            if owner is pygame.display:
+                setattr(owner, name, original)
+            else:
+                # Drop the instance attribute so the class method shows through
+                delattr(owner, name)
+    
+    def end_frame(self):
+        """Record the phases timed since the previous call as one frame"""
+        now = time.perf_counter()
+        slot = self.frames % self.history
+        for phase, seconds in self.current.items():
+            self.samples[phase][slot] = seconds * 1000
+            self.current[phase] = 0.0
+        self.samples["frame"][slot] = (now - self.frame_start) * 1000
+        self.frame_start = now
+        self.frames += 1
+    
+    def recorded(self, phase):
+        """Samples of a phase in the ring, oldest first"""
+        ring = self.samples[phase]
+        if self.frames <= self.history:
+            return ring[:self.frames]
+        slot = self.frames % self.history
+        return ring[slot:] + ring[:slot]
+    
+    def summary(self):
+        """Percentiles, mean and max in milliseconds for every phase"""
+        result = {}
+        for phase in PHASES + ("frame",):
+            values = sorted(self.recorded(phase))
+            if not values:
+                continue
+            stats = {f"p{p}": values[min(len(values) - 1, len(values) * p // 100)] for p in PERCENTILES}
+            stats["mean"] = sum(values) / len(values)
+            stats["max"] = values[-1]
+            result[phase] = stats
+        return result
+    
+    def draw_overlay(self):
+        """Draw the percentile table in the top right corner, returning its rect"""
+        window = pygame.display.get_surface()
+        if window is None or not self.frames:
+            return None
+        
+        # Sorting the ring every frame would distort what it measures, so
+        # the table is only re-rendered a couple of times per second
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time >= PROFILE_OVERLAY_INTERVAL:
+            self.overlay = self.render_overlay()
+            self.overlay_time = now
+        return window.blit(self.overlay, self.overlay.get_rect(topright=(WIN_WIDTH - 15, 15)))
+    
+    def render_overlay(self):
+        """Render the percentile table to a surface"""
+        lines = [f"{'ms':<10}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for phase, stats in self.summary().items():
+            lines.append(f"{phase:<10}{stats['p50']:>7.2f}{stats['p95']:>7.2f}{stats['p99']:>7.2f}")
+        
+        line_height = self.font.get_linesize()
+        width = max(self.font.size(line)[0] for line in lines)
+        surface = pygame.Surface((width + 10, line_height * len(lines) + 10))
+        surface.fill(BLACK)
+        for i, line in enumerate(lines):
+            surface.blit(self.font.render(line, True, WHITE), (5, 5 + i * line_height))
+        return surface.convert()
+    
+    def save(self, prefix):
+        """Write per-frame samples to <prefix>.csv and percentiles to <prefix>.json"""
+        columns = PHASES + ("frame",)
+        rows = zip(*(self.recorded(phase) for phase in columns))
+        first = max(0, self.frames - self.history)
+        with open(prefix + ".csv", "w") as f:
+            f.write("index," + ",".join(columns) + "\n")
+            for index, row in enumerate(rows, first):
+                f.write(f"{index}," + ",".join(f"{value:.4f}" for value in row) + "\n")
+        
+        with open(prefix + ".json", "w") as f:
+            json.dump({
+                "frames": self.frames,
+                "history": self.history,
+                "unit": "ms",
+                "phases": self.summary(),
+            }, f, indent=2)
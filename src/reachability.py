@@ -0,0 +1,146 @@
+"""
+Terrain survivability check
+
+Finds stretches of terrain that no SPACE input sequence can fly the
+helicopter through. The check is one-sided: every simplification below can
+only make terrain look easier, so terrain some input survives is never
+rejected, but terrain that passes is not proven survivable. It filters out
+impossible terrain; it does not guarantee fair terrain.
+
+- The state the helicopter arrives in is unknown, so the first frame allows
+  any y in the gap at any speed.
+- Each frame only requires the end-of-frame hitbox to clear the columns it
+  overlaps wherever in its column the terrain started. The swept path
+  check_swept_collision also tests is not constrained.
+- The terrain speed is taken to be constant over the stretch.
+
+Helicopter speed only ever changes by GRAVITY per frame, so it is always
+k * GRAVITY for an integer k. For every k the set of reachable helicopter
+y values is kept as one interval (lo[k], hi[k]), and one frame of play is a
+handful of NumPy operations over all k at once:
+
+    k' is reached from k' - 1 (SPACE held) or k' + 1 (released)
+    y' = y - k' * GRAVITY
+    y' must keep the hitbox inside the gap under it this frame
+
+The interval of a speed is the hull of what reaches it, which again can
+only overestimate the reachable set. A stretch is reported unsurvivable only
+when every interval has become empty.
+
+Most terrain is easy, so a simple steering rule is tried first. If it
+flies through the bands, the full pass is skipped.
+"""
+import numpy as np
+from src.settings import *
+
+MAX_SPEED_STEPS = 64  # Fastest vertical speed considered, in units of GRAVITY
+
+
+def frame_bands(heights, speed):
+    """Lowest and highest helicopter y allowed at the end of every frame over `heights`
+    
+    Frame 0 starts with the hitbox's left edge somewhere over column 0, and
+    the terrain moves `speed` pixels per frame. A frame's band comes from the
+    columns the end-of-frame hitbox overlaps at every starting offset within
+    column 0, with a pixel to spare for the truncated column x. Bands follow
+    check_collision's edge rules on get_rect's truncated top: a zero top
+    never collides, and the hitbox top may truncate down to one pixel short
+    of the bottom edge.
+    """
+    heights = np.asarray(heights, dtype=float)
+    lowest = np.where(heights > 0, heights + PLAYER_RADIUS, -np.inf)
+    highest = heights + (TERRAIN_GAP - PLAYER_RADIUS + 1)
+    
+    # Columns under the hitbox for frames 0, 1, 2, ... wherever it started
+    offset = np.arange(int(len(heights) * RECT_WIDTH / speed) + 1) * speed
+    first = np.floor_divide(offset + 1, RECT_WIDTH).astype(np.int64) + 1
+    last = np.ceil((offset + PLAYER_RADIUS * 2 - 1) / RECT_WIDTH).astype(np.int64) - 1
+    inside = last < len(heights)
+    first = first[inside]
+    last = last[inside]
+    
+    low = np.full(len(first), -np.inf)
+    high = np.full(len(first), np.inf)
+    for shift in range(int((last - first).max(initial=0)) + 1):
+        # Shorter spans repeat their last column, which changes nothing
+        column = np.minimum(first + shift, last)
+        np.maximum(low, lowest[column], out=low)
+        np.minimum(high, highest[column], out=high)
+    return low, high
+
+
+def steer_through(low, high, lookahead=6):
+    """Whether steering for the middle of the gap ahead stays inside every band"""
+    y = (low[0] + high[0]) / 2
+    y_speed = 0.0
+    last = len(low) - 1
+    for frame in range(1, len(low)):
+        ahead = min(frame + lookahead, last)
+        if y - y_speed * lookahead > (low[ahead] + high[ahead]) / 2:
+            y_speed += GRAVITY
+        else:
+            y_speed -= GRAVITY
+        y -= y_speed
+        if y < low[frame] or y > high[frame]:
+            return False
+    return True
+
+
+class ReachabilityCheck:
+    def __init__(self, max_speed_steps=MAX_SPEED_STEPS):
+        # Index i holds speed k = i - max_speed_steps. The two outermost
+        # speeds stay empty so every inner speed has both neighbours.
+        size = max_speed_steps * 2 + 1
+        self.velocity = (np.arange(size) - max_speed_steps) * GRAVITY
+        self.lo = np.empty(size)
+        self.hi = np.empty(size)
+        self.next_lo = np.empty(size)
+        self.next_hi = np.empty(size)
+        self.empty = np.empty(size, dtype=bool)
+    
+    def survivable(self, heights, speed):
+        """False if no input survives flying over the column tops in `heights`
+        
+        True does not prove that some input does (see the module docstring).
+        Nothing is known about how the helicopter arrives, so the first
+        frame allows any y in the gap at any speed. Passing a few columns of
+        already generated terrain before the ones being checked narrows that
+        down to states the earlier terrain allows.
+        """
+        low, high = frame_bands(heights, speed)
+        if len(low) == 0:
+            return True
+        if steer_through(low.tolist(), high.tolist()):
+            return True
+        
+        lo, hi = self.lo, self.hi
+        next_lo, next_hi, empty = self.next_lo, self.next_hi, self.empty
+        inner = self.velocity[1:-1]
+        lo.fill(low[0])
+        hi.fill(high[0])
+        lo[[0, -1]] = np.inf
+        hi[[0, -1]] = -np.inf
+        next_lo[[0, -1]] = np.inf
+        next_hi[[0, -1]] = -np.inf
+        
+        for band_low, band_high in zip(low[1:].tolist(), high[1:].tolist()):
+            # Hull of the intervals arriving from both neighbouring speeds,
+            # moved by the new speed
+            np.minimum(lo[:-2], lo[2:], out=next_lo[1:-1])
+            np.maximum(hi[:-2], hi[2:], out=next_hi[1:-1])
+            next_lo[1:-1] -= inner
+            next_hi[1:-1] -= inner
+            
+            # Keep the part inside this frame's gap
+            np.maximum(next_lo, band_low, out=next_lo)
+            np.minimum(next_hi, band_high, out=next_hi)
+            np.greater(next_lo, next_hi, out=empty)
+            if empty.all():
+                return False
+            # Mark emptied intervals so they cannot widen a hull next frame
+            np.copyto(next_lo, np.inf, where=empty)
+            np.copyto(next_hi, -np.inf, where=empty)
+            lo, next_lo = next_lo, lo
+            hi, next_hi = next_hi, hi
+        
+        return True
@@ -0,0 +1,116 @@
+"""
+Rendering backends
+
+Game hands every frame to one renderer, picked at startup:
+- pygame     draws with blits from pre-rendered surfaces (the default)
+- surfarray  rasterizes the terrain heightmap into the window's pixel
+             array with one NumPy gather, and draws the rest like pygame
+- null       draws nothing, for headless throughput runs
+"""
+import numpy as np
+import pygame
+from src.heights import MAX_TOP_HEIGHT
+from src.settings import *
+
+BORDER_WIDTH = 12
+
+
+class PygameRenderer:
+    def __init__(self, window):
+        self.window = window
+    
+    def draw(self, game):
+        """Draw the current game state"""
+        if game.state == "MENU":
+            game.menu.draw_main_menu()
+        
+        elif game.state == "SETTINGS":
+            game.menu.draw_settings_menu()
+        
+        elif game.state == "PLAYING":
+            # The terrain covers the whole window, so no clear is needed
+            dirty = self.draw_playfield(game)
+            dirty += game.draw_score()
+            # Whatever menu was on screen has been drawn over
+            game.menu.invalidate()
+            if game.game_started or game.full_redraw:
+                pygame.display.flip()
+                game.full_redraw = False
+            else:
+                # While waiting for SPACE only the helicopter and HUD can change
+                pygame.display.update(dirty)
+        
+        elif game.state == "GAME_OVER":
+            # Keep last frame visible under the overlay, and the crash debris over it
+            game.menu.draw_game_over(game.terrain.score, game.high_score,
+                                     lambda: self.draw_playfield(game, particles=False),
+                                     lambda: game.particles.draw(self.window),
+                                     rewind=game.rewind is not None)
+    
+    def draw_playfield(self, game, particles=True):
+        """Draw terrain, particles, ghosts and helicopter, returning the rects that can move"""
+        self.draw_terrain(game.terrain, game.alpha)
+        dirty = []
+        if particles:
+            rect = game.particles.draw(self.window)
+            if rect is not None:
+                dirty.append(rect)
+        if game.ghosts is not None:
+            rect = game.ghosts.draw(self.window, game.sim.frame, game.alpha)
+            if rect is not None:
+                dirty.append(rect)
+        dirty.append(game.player.draw(self.window, game.alpha))
+        return dirty
+    
+    def draw_terrain(self, terrain, alpha):
+        """Draw the terrain over the whole window"""
+        terrain.draw(alpha)
+
+
+class SurfarrayRenderer(PygameRenderer):
+    def __init__(self, window):
+        super().__init__(window)
+        self.pixel_x = np.arange(WIN_WIDTH)
+        self.pixels = pygame.surfarray.array2d(window)  # Reused every frame, in the window's format
+        self.black = window.map_rgb(BLACK)
+        
+        # Every pixel column the terrain can produce, one per possible top
+        # height, plus an all black one for x right of the last column. The
+        # top and bottom border is part of every strip.
+        pixel_y = np.arange(WIN_HEIGHT)
+        tops = np.arange(MAX_TOP_HEIGHT + 1)[:, None]
+        solid = (pixel_y < tops) | (pixel_y >= tops + TERRAIN_GAP)
+        strips = np.where(solid, window.map_rgb(GREEN), self.black).astype(self.pixels.dtype)
+        self.strips = np.vstack((strips, np.full((1, WIN_HEIGHT), self.black, strips.dtype)))
+        self.strips[:, :BORDER_WIDTH] = self.strips[:, -BORDER_WIDTH:] = self.black
+        self.empty_strip = MAX_TOP_HEIGHT + 1
+    
+    def draw_terrain(self, terrain, alpha):
+        """Rasterize the visible heightmap straight into the window's pixels"""
+        x, start, count = terrain.visible_span(alpha)
+        heights = np.frombuffer(terrain.heights, dtype=np.intc)
+        
+        # Column under every pixel x, then the column's top for it
+        column = (self.pixel_x - x) // RECT_WIDTH
+        visible = (column >= 0) & (column < count)
+        top = heights[(start + np.clip(column, 0, count - 1)) % terrain.capacity]
+        
+        # The whole frame is one gather of pre-rendered pixel columns
+        np.take(self.strips, np.where(visible, top, self.empty_strip), axis=0, out=self.pixels)
+        self.pixels[:BORDER_WIDTH] = self.pixels[-BORDER_WIDTH:] = self.black
+        pygame.surfarray.blit_array(self.window, self.pixels)
+
+
+class NullRenderer:
+    def __init__(self, window):
+        self.window = window
+    
+    def draw(self, game):
+        """Draw nothing"""
+
+
+RENDERERS = {
+    "pygame": PygameRenderer,
+    "surfarray": SurfarrayRenderer,
+    "null": NullRenderer,
+}
@@ -0,0 +1,197 @@
+"""
+Replay recording and verification
+
+A replay stores only what is needed to re-simulate a run: the terrain
+seed, the difficulty and the frames at which SPACE was pressed or
+released. The claimed score and frame count are stored too, so a replay
+can be checked by running it through the headless Simulation.
+
+File layout (little endian):
+    header  magic b"CPRP", version u8, difficulty index u8, seed u64,
+            score u32, frames u32, event count u32
+    events  one unsigned LEB128 varint per event holding
+            (frames since previous event << 1) | pressed
+
+Usage:
+    python -m src.replay replays/*.replay
+"""
+import struct
+import sys
+import time
+from src.settings import *
+from src.simulation import Simulation
+
+MAGIC = b"CPRP"
+# Bumped whenever a seed's terrain changes; record benchmarks/replays again
+# with benchmarks/record_replays.py after bumping it. 2: chunked terrain
+# generation, 3: unsurvivable chunks redrawn, 4: relaxed survivability
+# bands, 5: chunks checked at the multiplied terrain speed
+VERSION = 5
+HEADER = struct.Struct("<4sBBQIII")
+DIFFICULTIES = list(DIFFICULTY_MULTIPLIERS)
+
+
+class ReplayError(Exception):
+    """Raised for files that are not valid replays"""
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated event data")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    def __init__(self, seed, difficulty, events=None, score=0, frames=0):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.events = events if events is not None else []  # (frame, pressed) in order
+        self.score = score
+        self.frames = frames
+    
+    def to_bytes(self):
+        """Encode the replay in the compact binary format"""
+        out = bytearray(HEADER.pack(
+            MAGIC, VERSION, DIFFICULTIES.index(self.difficulty),
+            self.seed, self.score, self.frames, len(self.events)
+        ))
+        previous = 0
+        for frame, pressed in self.events:
+            _write_varint(out, (frame - previous) << 1 | int(pressed))
+            previous = frame
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode a replay produced by to_bytes"""
+        if len(data) < HEADER.size:
+            raise ReplayError("file too short")
+        magic, version, difficulty, seed, score, frames, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("not a version %d replay" % VERSION)
+        if difficulty >= len(DIFFICULTIES):
+            raise ReplayError("unknown difficulty %d" % difficulty)
+        
+        events = []
+        pos = HEADER.size
+        frame = 0
+        for _ in range(count):
+            value, pos = _read_varint(data, pos)
+            frame += value >> 1
+            events.append((frame, bool(value & 1)))
+        return cls(seed, DIFFICULTIES[difficulty], events, score, frames)
+    
+    def save(self, path):
+        """Write the replay to a file"""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path):
+        """Read a replay from a file"""
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+    
+    def simulate(self, sim=None):
+        """Re-run the replay headlessly and return (score, frames)"""
+        sim = sim if sim is not None else Simulation()
+        sim.difficulty = self.difficulty
+        sim.reset(self.seed)
+        
+        flying = False
+        next_event = 0
+        done = False
+        # Never run past the recorded end: a diverging replay must not loop forever
+        while not done and sim.frame <= self.frames:
+            # Apply every SPACE change made before this frame's update
+            while next_event < len(self.events) and self.events[next_event][0] <= sim.frame:
+                flying = self.events[next_event][1]
+                next_event += 1
+            _, score, done = sim.step(flying)
+        return sim.score, sim.frame
+    
+    def verify(self):
+        """Check that re-simulating reproduces the recorded score and length"""
+        return self.simulate() == (self.score, self.frames)
+
+
+class ReplayRecorder:
+    def __init__(self):
+        self.replay = None
+        self.finished = None  # Last completed replay, in case play is rewound into it
+    
+    def start(self, seed, difficulty):
+        """Begin recording a new run"""
+        self.replay = Replay(seed, difficulty)
+    
+    def record(self, frame, pressed):
+        """Log a SPACE press or release seen before the update of `frame`"""
+        if self.replay is not None:
+            self.replay.events.append((frame, pressed))
+    
+    def finish(self, score, frames):
+        """Stop recording and return the completed replay"""
+        replay = self.replay
+        self.replay = None
+        if replay is not None:
+            replay.score = score
+            replay.frames = frames
+        self.finished = replay
+        return replay
+    
+    def rewind(self, frame):
+        """Drop everything recorded from `frame` on, reopening a finished run if needed"""
+        if self.replay is None:
+            if self.finished is None:
+                return
+            self.replay = Replay(self.finished.seed, self.finished.difficulty, list(self.finished.events))
+        events = self.replay.events
+        while events and events[-1][0] >= frame:
+            events.pop()
+        if events and events[-1][1]:
+            # Play continues from a standstill with SPACE released
+            events.append((frame, False))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python -m src.replay FILE...")
+        sys.exit(2)
+    
+    failures = 0
+    for path in sys.argv[1:]:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"{path}: ERROR {e}")
+            failures += 1
+            continue
+        
+        started = time.perf_counter()
+        score, frames = replay.simulate()
+        elapsed = time.perf_counter() - started
+        ok = (score, frames) == (replay.score, replay.frames)
+        failures += not ok
+        print(f"{path}: {'OK' if ok else 'MISMATCH'} seed={replay.seed} {replay.difficulty} "
+              f"claimed {replay.score} in {replay.frames} frames, simulated {score} in {frames} "
+              f"({frames / elapsed if elapsed else 0:,.0f} frames/s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
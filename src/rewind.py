@@ -0,0 +1,185 @@
+"""
+Rewind and instant restart
+
+Rewind keeps a compact snapshot of the whole simulation after every step
+in a fixed-size ring, so play can jump back to any of the last few seconds,
+or to the start of the run, without regenerating anything. A snapshot is:
+
+- the helicopter's y, previous y, y speed and SPACE state
+- the terrain's scroll offset, speed, speed level, spacer, score and the
+  heightmap ring (unrolled from its first slot, as int16)
+- the height generator's position in its walk and its lookahead buffer
+
+All randomness in a run comes from the walk seed: every chunk of heights is
+drawn from a generator seeded by (seed, first column, spacer), so the seed
+plus the generator's column index is the complete RNG state.
+
+The lookahead buffer only changes when a chunk is generated or the spacer
+changes, so it is stored in a ring of its own and each snapshot points at
+the copy it had. A snapshot also keeps where the next copy would go, so
+going back to it hands out the rows of the undone future again instead of
+overwriting copies older snapshots still point at. Recording a frame
+copies into preallocated arrays and restoring one copies back, both
+independent of how much history is kept.
+"""
+import numpy as np
+from src.heights import CONTEXT_COLUMNS
+from src.settings import *
+
+# (object, attribute, type) of every scalar kept per snapshot
+FIELDS = (
+    ("player", "y", float),
+    ("player", "previous_y", float),
+    ("player", "y_speed", float),
+    ("player", "flying", bool),
+    ("terrain", "count", int),
+    ("terrain", "x", float),
+    ("terrain", "last_scroll", float),
+    ("terrain", "generated", int),
+    ("terrain", "spacer", int),
+    ("terrain", "speed", float),
+    ("terrain", "score", int),
+    ("terrain", "speed_level", int),
+    ("terrain", "next_speed_threshold", float),
+    ("generator", "spacer", int),
+    ("generator", "speed", float),
+    ("generator", "pos", int),
+    ("generator", "taken", int),
+    ("generator", "rejected", int),
+    ("sim", "frame", int),
+)
+
+
+class Rewind:
+    def __init__(self, sim, seconds=REWIND_SECONDS, max_bytes=REWIND_MAX_BYTES):
+        self.sim = sim
+        self.objects = {
+            "player": sim.player,
+            "terrain": sim.terrain,
+            "generator": sim.terrain.generator,
+            "sim": sim,
+        }
+        self.ring = np.frombuffer(sim.terrain.heights, dtype=np.intc)  # Live heightmap, not a copy
+        capacity = sim.terrain.capacity
+        buffer_size = CONTEXT_COLUMNS + 2 * sim.terrain.generator.chunk_size
+        
+        # Frames that fit under the cap; one extra row of every array holds
+        # the start of the run for instant restarts
+        frame_bytes = len(FIELDS) * 8 + capacity * 2 + buffer_size * 2 + 4 + 4 + 4
+        self.size = max(1, min(int(seconds * TICK_RATE), max_bytes // frame_bytes - 1))
+        self.start_row = self.size
+        self.values = np.zeros((self.size + 1, len(FIELDS)))
+        self.heights = np.zeros((self.size + 1, capacity), dtype=np.int16)
+        self.buffer_of = np.zeros(self.size + 1, dtype=np.int32)  # Buffer row of every snapshot
+        self.next_buffer_of = np.zeros(self.size + 1, dtype=np.int32)  # next_buffer after every snapshot
+        self.buffers = np.zeros((self.size + 1, buffer_size), dtype=np.int16)
+        self.buffer_lengths = np.zeros(self.size + 1, dtype=np.int32)
+        
+        self.newest = -1  # Ring row of the latest snapshot
+        self.stored = 0  # Snapshots in the ring
+        self.next_buffer = 0  # Buffer row the next lookahead copy goes to
+        self.buffer_row = -1  # Buffer row holding the current lookahead
+        self.buffer_version = None  # Generator version that copy was taken at
+        self.seed = None  # Seed and difficulty of the run being recorded
+        self.difficulty = None
+    
+    @property
+    def nbytes(self):
+        """Memory held by the snapshot arrays"""
+        return sum(array.nbytes for array in (
+            self.values, self.heights, self.buffer_of, self.next_buffer_of, self.buffers, self.buffer_lengths
+        ))
+    
+    def report(self):
+        """One line on how much play is kept in how much memory"""
+        return (f"rewind: {self.size / TICK_RATE:.1f} s of snapshots in "
+                f"{self.nbytes / 1024:.0f} KB")
+    
+    @property
+    def seconds(self):
+        """Seconds of play that can currently be rewound"""
+        return max(0, self.stored - 1) / TICK_RATE
+    
+    def clear(self, seed):
+        """Forget all snapshots and keep the current state as the start of a run with seed"""
+        self.seed = seed
+        self.difficulty = self.sim.difficulty
+        self.newest = -1
+        self.stored = 0
+        self.next_buffer = 0
+        self.buffer_version = None
+        self._write(self.start_row, self.start_row)
+        self.record()
+    
+    def record(self):
+        """Snapshot the state after the latest step"""
+        self.newest = (self.newest + 1) % self.size
+        self.stored = min(self.stored + 1, self.size)
+        self._write(self.newest)
+    
+    def can_restart(self, seed, difficulty):
+        """Whether a run with this seed and difficulty can start from the saved start"""
+        return self.seed is not None and (seed, difficulty) == (self.seed, self.difficulty)
+    
+    def restart(self):
+        """Go back to the start of the run"""
+        self._read(self.start_row)
+        self.clear(self.seed)
+    
+    def restore(self, frames_back):
+        """Go back up to frames_back steps, returning how many were undone"""
+        frames_back = min(frames_back, self.stored - 1)
+        row = (self.newest - frames_back) % self.size
+        self._read(row)
+        # Later snapshots belong to the future that was undone
+        self.newest = row
+        self.stored -= frames_back
+        return frames_back
+    
+    def _write(self, row, buffer_row=None):
+        terrain = self.sim.terrain
+        generator = terrain.generator
+        values = self.values[row]
+        for i, (owner, name, _) in enumerate(FIELDS):
+            values[i] = getattr(self.objects[owner], name)
+        
+        # The heightmap ring is stored starting at its first slot
+        start = terrain.start
+        tail = terrain.capacity - start
+        heights = self.heights[row]
+        heights[:tail] = self.ring[start:]
+        heights[tail:] = self.ring[:start]
+        
+        # The lookahead is only copied when the generator has changed it
+        if generator.version != self.buffer_version:
+            if buffer_row is None:
+                buffer_row = self.next_buffer
+                self.next_buffer = (self.next_buffer + 1) % self.size
+            length = len(generator.buffer)
+            self.buffers[buffer_row, :length] = generator.buffer
+            self.buffer_lengths[buffer_row] = length
+            self.buffer_row = buffer_row
+            self.buffer_version = generator.version
+        self.buffer_of[row] = self.buffer_row
+        self.next_buffer_of[row] = self.next_buffer
+    
+    def _read(self, row):
+        terrain = self.sim.terrain
+        generator = terrain.generator
+        for (owner, name, kind), value in zip(FIELDS, self.values[row].tolist()):
+            setattr(self.objects[owner], name, kind(value))
+        
+        # Written back unrolled, so the first column moves to slot 0
+        self.ring[:] = self.heights[row]
+        terrain.start = 0
+        terrain.restored()
+        
+        buffer_row = int(self.buffer_of[row])
+        generator.buffer = self.buffers[buffer_row, :self.buffer_lengths[buffer_row]].tolist()
+        generator.version += 1
+        # The restored lookahead is that row's copy, and rows handed out
+        # after this snapshot are free again
+        self.buffer_row = buffer_row
+        self.buffer_version = generator.version
+        self.next_buffer = int(self.next_buffer_of[row])
+        self.sim.done = False
@@ -1,12 +1,13 @@
 """
 Game settings and configuration constants
 """
-import pygame
 
 # Window settings
 WIN_WIDTH = 1000
 WIN_HEIGHT = 600
-FPS = 60
+FPS = 144  # Render rate cap
+TICK_RATE = 60  # Simulation steps per second, independent of FPS
+MAX_TICKS_PER_FRAME = 5  # Catch-up cap so one slow frame cannot snowball
 
 # Colors
 BLACK = (0, 0, 0)
@@ -20,23 +21,58 @@ PLAYER_START_X = 100
 PLAYER_START_Y = 300
 PLAYER_RADIUS = 20
 GRAVITY = 0.3
+GHOST_ALPHA = 80  # Opacity of raced ghost helicopters, 0-255
 
 # Terrain settings
 RECT_WIDTH = 10
 TERRAIN_GAP = 300  # Gap between top and bottom terrain
 TERRAIN_VARIATION = 10  # Initial spacer value
+TERRAIN_CHUNK_SIZE = 64  # Columns generated ahead at a time
+TERRAIN_CHECK_ATTEMPTS = 8  # Unsurvivable chunks redrawn before one is repaired
 
 # Game settings
 INITIAL_MAP_SPEED = 2
 SPEED_INCREASE_RATE = 50  # Base interval for speed increases (progressive: 50, 100, 150, 200...)
 SPACER_INCREASE_RATE = 100  # Score points needed to increase terrain variation
 MAX_SPEED = 40  # Maximum terrain speed to keep game playable
+DIFFICULTY_MULTIPLIERS = {"Easy": 0.7, "Normal": 1.0, "Hard": 1.5}  # Terrain speed multiplier
 
 # Font settings
 FONT_NAME = 'freesansbold.ttf'
 FONT_SIZE = 20
 MENU_FONT_SIZE = 40
 TITLE_FONT_SIZE = 60
+TEXT_CACHE_SIZE = 32  # Rendered text surfaces kept for reuse
+
+# Particle settings
+PARTICLE_CAPACITY = 1024  # Most particles alive at once
+PARTICLE_SPAWN_BUDGET = 192  # Most particles spawned in one frame
+PARTICLE_SIZE = 2  # Square side in pixels
+WASH_PARTICLES = 3  # Rotor wash particles per simulation step
+WASH_LIFETIME = 0.35  # Seconds, on average
+WASH_SPEED = 150  # Downward speed of the wash in pixels per second
+WASH_SPREAD = 60  # Random speed added in any direction
+DEBRIS_PARTICLES = 160  # Particles in a crash burst
+DEBRIS_LIFETIME = 1.0
+DEBRIS_SPREAD = 350
+DEBRIS_GRAVITY = 900  # Pixels per second squared
+
+# Rewind settings
+REWIND_SECONDS = 10  # Play kept for rewinding
+REWIND_MAX_BYTES = 1 << 20  # Cap on snapshot memory; fewer seconds are kept if they do not fit
+REWIND_STEP = 3  # Seconds one rewind goes back
+
+# Profiler settings
+PROFILE_HISTORY = 600  # Frames kept for percentiles
+PROFILE_OVERLAY_INTERVAL = 0.5  # Seconds between overlay refreshes
+PROFILE_FONT_SIZE = 14
+LATENCY_BUCKET_MS = 2  # Input latency histogram bucket width
+LATENCY_BUCKETS = 20  # Buckets shown; slower inputs are counted in the last
+
+# Low-latency loop settings
+LATE_POLL_MARGIN = 0.002  # Least time in seconds left between polling input and the vblank
+WAIT_SLICE = 0.001  # Longest sleep between event polls while waiting for a frame
+SPIN_TIME = 0.001  # Final stretch of a low-latency wait spent polling instead of sleeping
 
 # Asset paths
 HELICOPTER_IMAGE = 'assets/helicopter.png'
@@ -0,0 +1,251 @@
+"""
+Simulation in its own process
+
+With --split the simulation steps in a child process at TICK_RATE, so a
+slow draw or display flip in the game's process no longer delays physics
+and collision. The two processes share one multiprocessing.shared_memory
+block and never lock it:
+
+- control words, each written by one side only: the run the game asked
+  for (with its seed and difficulty), a quit flag, and the slot of the
+  latest snapshot
+- two snapshot slots (double buffering). The simulation writes the slot the
+  game is not reading, under a seqlock: its sequence number is odd while
+  the slot is being written. A slot holds the heightmap ring and the
+  scalars needed to draw a frame (helicopter, scroll, score, frame number).
+- a byte ring carrying SPACE presses and releases to the simulation, with a
+  head only the game advances and a tail only the simulation advances
+
+The game binds its Terrain's heightmap straight to the latest slot, so
+nothing but a handful of scalars is copied per frame. A draw that outlasts
+a whole simulation step can see its slot rewritten; the sequence number
+catches that and the terrain is repainted from a consistent snapshot.
+"""
+import multiprocessing
+import time
+from array import array
+from multiprocessing import shared_memory
+import numpy as np
+from src.settings import *
+from src.simulation import Simulation, TerrainMap
+
+DIFFICULTIES = list(DIFFICULTY_MULTIPLIERS)
+INPUT_SIZE = 256  # Bytes in the SPACE ring; the simulation drains it every step
+
+# Control words
+RUN, SEED, DIFFICULTY, QUIT, INPUT_HEAD, INPUT_TAIL, LATEST = range(7)
+CONTROL_WORDS = 8
+
+# Snapshot scalars: (object, attribute) written back into the game's mirrors
+SCALARS = (
+    ("player", "y"),
+    ("player", "previous_y"),
+    ("player", "y_speed"),
+    ("player", "flying"),
+    ("terrain", "start"),
+    ("terrain", "count"),
+    ("terrain", "x"),
+    ("terrain", "last_scroll"),
+    ("terrain", "generated"),
+    ("terrain", "score"),
+    ("terrain", "speed"),
+    ("sim", "frame"),
+    ("sim", "done"),
+)
+# Slot header words, before the scalars
+SEQUENCE, SLOT_RUN, PUBLISHED, LATENESS = range(4)
+SLOT_HEADER = 4
+
+
+class MirroredTerrainMap(TerrainMap):
+    """TerrainMap with the ring layout of the drawing Terrain that mirrors it"""
+    def __init__(self, history_columns):
+        self.history_columns = history_columns
+        super().__init__()
+
+
+class SharedState:
+    """Typed views of the shared block, the same layout in both processes"""
+    def __init__(self, buffer, capacity):
+        self.capacity = capacity
+        words = CONTROL_WORDS * 8
+        slot_values = (SLOT_HEADER + len(SCALARS)) * 8
+        slot_bytes = slot_values + capacity * 4
+        self.control = np.ndarray(CONTROL_WORDS, np.int64, buffer, 0)
+        self.seed = np.ndarray(1, np.uint64, buffer, SEED * 8)
+        self.values = [np.ndarray(SLOT_HEADER + len(SCALARS), np.float64, buffer, words + i * slot_bytes)
+                       for i in range(2)]
+        self.heights = [buffer[words + i * slot_bytes + slot_values:words + (i + 1) * slot_bytes].cast("i")
+                        for i in range(2)]
+        self.inputs = np.ndarray(INPUT_SIZE, np.uint8, buffer, words + 2 * slot_bytes)
+    
+    @staticmethod
+    def size(capacity):
+        """Bytes of shared memory needed for a heightmap ring of capacity"""
+        return CONTROL_WORDS * 8 + 2 * ((SLOT_HEADER + len(SCALARS)) * 8 + capacity * 4) + INPUT_SIZE
+    
+    def release(self):
+        """Drop every view so the shared block can be closed"""
+        for view in self.heights:
+            view.release()
+        self.control = self.seed = self.values = self.heights = self.inputs = None
+
+
+def run_simulation(name, capacity, history_columns):
+    """Child process: step the simulation at TICK_RATE and publish every step"""
+    block = shared_memory.SharedMemory(name)
+    state = SharedState(block.buf, capacity)
+    control = state.control
+    sim = Simulation(terrain=MirroredTerrainMap(history_columns))
+    objects = {"player": sim.player, "terrain": sim.terrain, "sim": sim}
+    ring = np.frombuffer(sim.terrain.heights, dtype=np.intc)
+    tick_time = 1 / TICK_RATE
+    
+    def publish(lateness=0.0):
+        slot = 1 - control[LATEST] if control[LATEST] >= 0 else 0
+        values = state.values[slot]
+        values[SEQUENCE] += 1  # Odd: being written
+        values[SLOT_RUN] = run
+        values[LATENESS] = lateness
+        for i, (owner, attribute) in enumerate(SCALARS, SLOT_HEADER):
+            values[i] = getattr(objects[owner], attribute)
+        np.copyto(np.frombuffer(state.heights[slot], dtype=np.intc), ring)
+        values[PUBLISHED] = time.perf_counter()
+        values[SEQUENCE] += 1
+        control[LATEST] = slot
+    
+    run = 0
+    started = False
+    flying = False
+    next_tick = 0.0
+    try:
+        while not control[QUIT]:
+            if control[RUN] != run:
+                run = int(control[RUN])
+                sim.difficulty = DIFFICULTIES[control[DIFFICULTY]]
+                sim.reset(int(state.seed[0]))
+                control[INPUT_TAIL] = control[INPUT_HEAD]  # Input for the old run is stale
+                started = flying = False
+                publish()
+            
+            # Drain SPACE changes; the first press starts the run
+            head = control[INPUT_HEAD]
+            tail = control[INPUT_TAIL]
+            while tail < head:
+                flying = bool(state.inputs[tail % INPUT_SIZE])
+                if flying and not started:
+                    started = True
+                    next_tick = time.perf_counter()
+                tail += 1
+            control[INPUT_TAIL] = tail
+            
+            now = time.perf_counter()
+            if not started or sim.done:
+                time.sleep(WAIT_SLICE)
+                continue
+            if now < next_tick:
+                time.sleep(min(next_tick - now, WAIT_SLICE))
+                continue
+            
+            lateness = now - next_tick
+            sim.step(flying)
+            publish(lateness)
+            next_tick += tick_time
+            if now - next_tick > MAX_TICKS_PER_FRAME * tick_time:
+                # Too far behind to catch up, as in Game.update
+                next_tick = now
+    finally:
+        del ring, objects
+        state.release()
+        block.close()
+
+
+class SimulationProcess:
+    """The game's handle on a simulation stepping in a child process"""
+    def __init__(self, capacity, history_columns):
+        self.block = shared_memory.SharedMemory(create=True, size=SharedState.size(capacity))
+        self.state = SharedState(self.block.buf, capacity)
+        self.state.control[:] = 0
+        self.state.control[LATEST] = -1
+        self.reading = None  # (slot, sequence) of the snapshot being drawn
+        self.mirror = None  # Terrain whose heightmap is bound to a slot
+        self.torn = 0  # Draws whose snapshot was rewritten under them
+        
+        # spawn, so the child does not inherit the game's SDL state
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=run_simulation, daemon=True,
+                                       args=(self.block.name, capacity, history_columns))
+        self.process.start()
+    
+    def reset(self, seed, difficulty):
+        """Start a new run and wait until its first snapshot is published"""
+        control = self.state.control
+        self.state.seed[0] = seed
+        control[DIFFICULTY] = DIFFICULTIES.index(difficulty)
+        control[RUN] += 1
+        while True:
+            latest = control[LATEST]
+            if latest >= 0 and self.state.values[latest][SLOT_RUN] == control[RUN]:
+                return
+            if not self.process.is_alive():
+                raise RuntimeError("simulation process exited")
+            time.sleep(WAIT_SLICE / 4)
+    
+    def send(self, pressed):
+        """Queue a SPACE press or release for the simulation's next step"""
+        control = self.state.control
+        head = control[INPUT_HEAD]
+        if head - control[INPUT_TAIL] >= INPUT_SIZE:
+            return  # Ring full; cannot happen unless the simulation stalls
+        self.state.inputs[head % INPUT_SIZE] = pressed
+        control[INPUT_HEAD] = head + 1
+    
+    def read(self, sim):
+        """Point sim's mirrors at the latest snapshot, returning its publish time"""
+        objects = {"player": sim.player, "terrain": sim.terrain, "sim": sim}
+        while True:
+            slot = int(self.state.control[LATEST])
+            values = self.state.values[slot]
+            sequence = values[SEQUENCE]
+            if sequence % 2:
+                continue  # Being written: it is about to become the older slot
+            scalars = values[SLOT_HEADER:].tolist()
+            published = float(values[PUBLISHED])
+            if values[SEQUENCE] == sequence:
+                break
+        for (owner, attribute), value in zip(SCALARS, scalars):
+            kind = bool if attribute in ("flying", "done") else int if attribute in (
+                "start", "count", "generated", "score", "frame") else float
+            setattr(objects[owner], attribute, kind(value))
+        sim.terrain.heights = self.state.heights[slot]
+        self.mirror = sim.terrain
+        self.reading = (slot, sequence)
+        return published
+    
+    def check_read(self):
+        """Whether the snapshot last read was left alone while it was being drawn"""
+        if self.reading is None:
+            return True
+        slot, sequence = self.reading
+        self.reading = None
+        if self.state.values[slot][SEQUENCE] == sequence:
+            return True
+        self.torn += 1
+        return False
+    
+    def lateness(self):
+        """How late the simulation ran its latest step, in seconds"""
+        return float(self.state.values[int(self.state.control[LATEST])][LATENESS])
+    
+    def close(self):
+        """Stop the simulation process and free the shared block"""
+        self.state.control[QUIT] = 1
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.mirror is not None:
+            # Keep the last snapshot's heightmap once the block is gone
+            self.mirror.heights = array('i', self.mirror.heights)
+        self.state.release()
+        self.block.close()
+        self.block.unlink()
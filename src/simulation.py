@@ -0,0 +1,297 @@
+"""
+Headless simulation core
+
+Everything needed to play a game - helicopter physics, terrain scrolling,
+scoring, difficulty and collision - without importing pygame. Terrain
+heights come from heights.py, so NumPy is still required. The pygame
+classes in player.py and terrain.py extend these with drawing, and Game
+renders whatever Simulation steps.
+"""
+import random
+from array import array
+from src.heights import HeightGenerator
+from src.settings import *
+
+
+class HelicopterBody:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.y_speed = 0
+        self.previous_y = y  # y before the last update, for interpolation
+        self.flying = False
+        self.radius = PLAYER_RADIUS
+    
+    def reset(self, y=None):
+        """Reset helicopter to starting position"""
+        self.x = PLAYER_START_X
+        if y is not None:
+            self.y = y
+        else:
+            self.y = PLAYER_START_Y
+        self.previous_y = self.y
+        self.y_speed = 0
+        self.flying = False
+    
+    def set_flying(self, flying):
+        """Set flying state"""
+        self.flying = flying
+    
+    def update(self):
+        """Update helicopter position"""
+        if self.flying:
+            self.y_speed += GRAVITY
+        else:
+            self.y_speed -= GRAVITY
+        self.previous_y = self.y
+        self.y -= self.y_speed
+    
+    def get_rect(self):
+        """Get collision rectangle as an (x, y, width, height) tuple"""
+        # Truncate the same way pygame.Rect does
+        return (
+            int(self.x - self.radius),
+            int(self.y - self.radius),
+            self.radius * 2,
+            self.radius * 2
+        )
+
+
+class TerrainMap:
+    # Extra ring slots that keep columns which just scrolled off the left,
+    # for renderers that draw the terrain a fraction of a step behind
+    history_columns = 0
+    
+    def __init__(self):
+        self.total_rects = WIN_WIDTH // RECT_WIDTH
+        
+        # Column top heights live in a fixed-size ring buffer. Column i on
+        # screen (0 = leftmost) is stored at heights[(start + i) % capacity]
+        # and sits at x = self.x + i * RECT_WIDTH. The bottom rect of every
+        # column is always top_height + TERRAIN_GAP, so it is not stored.
+        # Scrolling removes at most one column off the left for every column
+        # added on the right, which keeps the count within total_rects + 3.
+        self.capacity = self.total_rects + 3 + self.history_columns
+        self.heights = array('i', [0] * self.capacity)
+        self.start = 0
+        self.count = 0
+        self.x = 0
+        self.last_scroll = 0  # Distance the terrain moved in the last update
+        self.generated = 0  # Columns generated since the last reset
+        
+        # Each terrain owns its generator so a seed reproduces a whole run.
+        # Column heights are generated ahead in chunks by `generator`; the
+        # random generator only picks the seed of each new walk.
+        self.random = random.Random()
+        self.generator = HeightGenerator()
+        
+        self.spacer = TERRAIN_VARIATION
+        self.speed = INITIAL_MAP_SPEED
+        self.speed_multiplier = 1.0  # Difficulty multiplier, set by Simulation.reset
+        self.score = 0
+        self.speed_level = 0  # Track current speed level
+        self.next_speed_threshold = SPEED_INCREASE_RATE  # First increase at 50 points
+    
+    def generate_new(self):
+        """Generate new terrain"""
+        self.start = 0
+        self.count = 0
+        self.x = 0
+        self.last_scroll = 0
+        # Chunks are checked at the speed the terrain will actually move
+        check_speed = min(INITIAL_MAP_SPEED * self.speed_multiplier, MAX_SPEED)
+        self.generator.reset(self.random.getrandbits(64), self.spacer, check_speed)
+        
+        for i in range(self.total_rects):
+            top_height = self.generator.take()
+            self.heights[i] = top_height
+            self.count += 1
+        self.generated = self.count
+        
+        # Return a good starting Y position for player
+        return top_height + 150
+    
+    def reset(self, seed=None):
+        """Reset terrain, reseeding its generator when a seed is given"""
+        if seed is not None:
+            self.random.seed(seed)
+        self.spacer = TERRAIN_VARIATION
+        self.speed = INITIAL_MAP_SPEED
+        self.score = 0
+        self.speed_level = 0
+        self.next_speed_threshold = SPEED_INCREASE_RATE
+        return self.generate_new()
+    
+    def restored(self):
+        """Called after a rewind wrote the heightmap and the rest of the state back"""
+    
+    def update(self):
+        """Move terrain and generate new segments"""
+        self.x -= self.speed
+        self.last_scroll = self.speed
+        
+        # Keep removing off-screen columns and generating new ones
+        # Use while loop to handle high speeds where multiple columns go off-screen per frame
+        while self.count > 0 and self.x + RECT_WIDTH < 0:
+            # Remove leftmost column
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+            self.x += RECT_WIDTH
+            self.score += 1
+        
+        # Keep generating new columns until the screen is filled
+        # This prevents gaps when moving at high speeds
+        while self.count > 0 and self.x + (self.count - 1) * RECT_WIDTH < WIN_WIDTH:
+            # Add the next precomputed column on the right
+            self.heights[(self.start + self.count) % self.capacity] = self.generator.take()
+            self.count += 1
+            self.generated += 1
+        
+        # Generate the next chunk now if the lookahead is running low, rather
+        # than one column at a time as they scroll in
+        self.generator.fill()
+    
+    def column_at(self, x):
+        """Return (top, bottom) of the terrain gap at screen x"""
+        i = min(max(0, int((x - self.x) // RECT_WIDTH)), self.count - 1)
+        top_height = self.heights[(self.start + i) % self.capacity]
+        return top_height, top_height + TERRAIN_GAP
+    
+    def check_collision(self, player_rect):
+        """Check if player collides with terrain"""
+        left, top, width, height = player_rect
+        right = left + width
+        bottom = top + height
+        
+        # Only the columns under the player can collide, so map the player's
+        # x span straight to column indices instead of scanning the screen.
+        # One extra column on each side absorbs the int() truncation pygame
+        # applies to the fractional column x.
+        first = max(0, int((left - self.x) // RECT_WIDTH) - 1)
+        last = min(self.count - 1, int((right - self.x) // RECT_WIDTH) + 1)
+        
+        for i in range(first, last + 1):
+            # Same edge rules as pygame.Rect.colliderect on the column rects,
+            # including that a zero-height top rect never collides
+            column_x = int(self.x + i * RECT_WIDTH)
+            if left >= column_x + RECT_WIDTH or right <= column_x:
+                continue
+            top_height = self.heights[(self.start + i) % self.capacity]
+            if top_height > 0 and top < top_height and bottom > 0:
+                return True
+            if bottom > top_height + TERRAIN_GAP and top < top_height + TERRAIN_GAP + WIN_HEIGHT:
+                return True
+        return False
+    
+    def check_swept_collision(self, player_rect, y_speed):
+        """Check collision along the whole path the player moved during the last frame"""
+        if self.check_collision(player_rect):
+            return True
+        
+        scroll = self.last_scroll
+        if scroll <= 0:
+            return False
+        
+        left, top, width, height = player_rect
+        right = left + width
+        
+        # Relative to the terrain the player slid right by `scroll` while its
+        # top moved from top + y_speed to top. With u running from 1 (start of
+        # the frame) to 0 (end), a column now at x was at x + scroll * u and
+        # the player top was at top + y_speed * u, so each column it swept
+        # past is one interval of u tested against the column's two edges.
+        first = max(0, int((left - scroll - self.x) // RECT_WIDTH) - 1)
+        last = min(self.count - 1, int((right - self.x) // RECT_WIDTH) + 1)
+        
+        for i in range(first, last + 1):
+            column_x = self.x + i * RECT_WIDTH
+            enter = max(0.0, (left - RECT_WIDTH - column_x) / scroll)
+            leave = min(1.0, (right - column_x) / scroll)
+            if enter >= leave:
+                continue
+            
+            # The player's y is linear in u, so its extremes over the
+            # overlap are at the ends of the interval
+            top_a = top + y_speed * enter
+            top_b = top + y_speed * leave
+            highest = min(top_a, top_b)
+            lowest = max(top_a, top_b)
+            
+            top_height = self.heights[(self.start + i) % self.capacity]
+            if top_height > 0 and highest < top_height and lowest + height > 0:
+                return True
+            if lowest + height > top_height + TERRAIN_GAP and highest < top_height + TERRAIN_GAP + WIN_HEIGHT:
+                return True
+        return False
+    
+    def update_difficulty(self):
+        """Update speed and spacer based on score with progressive thresholds"""
+        # Check if we've reached the next speed threshold
+        if self.score >= self.next_speed_threshold:
+            self.speed_level += 1
+            # Next threshold increases progressively: 50, 100, 150, 200, etc.
+            self.next_speed_threshold += SPEED_INCREASE_RATE * (self.speed_level + 1)
+        
+        # Calculate speed based on speed level, then apply the difficulty
+        # multiplier and cap at maximum speed
+        self.speed = min((INITIAL_MAP_SPEED + self.speed_level) * self.speed_multiplier, MAX_SPEED)
+        
+        # Spacer still increases linearly with score. Columns generated ahead
+        # with the old spacer, or checked at the old speed, are regenerated.
+        self.spacer = TERRAIN_VARIATION + self.score // SPACER_INCREASE_RATE
+        self.generator.retune(self.spacer, self.speed)
+
+
+class Simulation:
+    def __init__(self, difficulty="Normal", player=None, terrain=None):
+        # Game passes in its drawable Helicopter and Terrain; headless users
+        # get the plain physics classes
+        self.player = player if player is not None else HelicopterBody(PLAYER_START_X, PLAYER_START_Y)
+        self.terrain = terrain if terrain is not None else TerrainMap()
+        self.difficulty = difficulty
+        self.frame = 0
+        self.done = False
+    
+    @property
+    def difficulty_multiplier(self):
+        """Speed multiplier for the current difficulty"""
+        return DIFFICULTY_MULTIPLIERS[self.difficulty]
+    
+    @property
+    def score(self):
+        """Current score of the run"""
+        return self.terrain.score
+    
+    def reset(self, seed=None):
+        """Start a new run and return the first observation"""
+        self.terrain.speed_multiplier = self.difficulty_multiplier
+        player_start_y = self.terrain.reset(seed)
+        self.player.reset(player_start_y)
+        self.frame = 0
+        self.done = False
+        return self.observe()
+    
+    def step(self, action):
+        """Advance one frame with SPACE held (truthy action) or released"""
+        if self.done:
+            return self.observe(), self.terrain.score, True
+        
+        # Update player
+        self.player.set_flying(bool(action))
+        self.player.update()
+        
+        # Update terrain, then its speed and spacer for the next frame
+        self.terrain.update()
+        self.terrain.update_difficulty()
+        self.frame += 1
+        
+        # Check collision along everything passed this frame, so fast
+        # terrain cannot skip over narrow spikes between frames
+        player_rect = self.player.get_rect()
+        self.done = self.terrain.check_swept_collision(player_rect, self.player.y_speed)
+        return self.observe(), self.terrain.score, self.done
+    
+    def observe(self):
+        """Return (y, y_speed, gap_top, gap_bottom) at the helicopter's x"""
+        gap_top, gap_bottom = self.terrain.column_at(self.player.x)
+        return self.player.y, self.player.y_speed, gap_top, gap_bottom
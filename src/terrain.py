@@ -1,106 +1,91 @@
 """
 Terrain generation and management
 """
-import random
+import math
 import pygame
 from src.settings import *
+from src.simulation import TerrainMap
 
 
-class Terrain:
+class Terrain(TerrainMap):
+    # Drawing between two simulation steps can show up to one step's scroll
+    # of columns that have already left the map
+    history_columns = MAX_SPEED // RECT_WIDTH + 2
+    
     def __init__(self, window):
+        super().__init__()
         self.window = window
-        self.rects = []
-        self.total_rects = WIN_WIDTH // RECT_WIDTH
-        self.spacer = TERRAIN_VARIATION
-        self.speed = INITIAL_MAP_SPEED
-        self.score = 0
-        self.speed_level = 0  # Track current speed level
-        self.next_speed_threshold = SPEED_INCREASE_RATE  # First increase at 50 points
+        
+        # Offscreen copy of the terrain laid out like the heightmap ring:
+        # ring slot s is painted at x = s * RECT_WIDTH. A column is painted
+        # once when it is generated, and scrolling only moves the part of
+        # this surface that gets blitted to the window.
+        size = (self.capacity * RECT_WIDTH, WIN_HEIGHT)
+        if window is not None:
+            self.surface = pygame.Surface(size, 0, window)
+        else:
+            self.surface = pygame.Surface(size)
+        self.painted = 0  # Value of self.generated when columns were last painted
     
     def generate_new(self):
         """Generate new terrain"""
-        self.rects = []
-        top_height = random.randint(0, 300)
-        
-        for i in range(self.total_rects):
-            top_height = random.randint(
-                max(0, top_height - self.spacer),
-                min(300, top_height + self.spacer)
-            )
-            
-            # Create top and bottom rectangles
-            top_rect = (i * RECT_WIDTH, 0, RECT_WIDTH, top_height)
-            bot_rect = (i * RECT_WIDTH, top_height + TERRAIN_GAP, RECT_WIDTH, WIN_HEIGHT)
-            
-            self.rects.append(top_rect)
-            self.rects.append(bot_rect)
-        
-        # Return a good starting Y position for player
-        return top_height + 150
+        player_start_y = super().generate_new()
+        # Every column is new, so repaint the whole screen on the next draw
+        self.painted = 0
+        return player_start_y
     
-    def reset(self):
-        """Reset terrain"""
-        self.spacer = TERRAIN_VARIATION
-        self.speed = INITIAL_MAP_SPEED
-        self.score = 0
-        self.speed_level = 0
-        self.next_speed_threshold = SPEED_INCREASE_RATE
-        return self.generate_new()
+    def restored(self):
+        """Repaint every visible column on the next draw, since a rewind rewrote them"""
+        # History slots only ever show columns that were visible a step
+        # earlier, so painting the visible columns covers them as well
+        self.painted = 0
     
-    def update(self):
-        """Move terrain and generate new segments"""
-        for i in range(len(self.rects)):
-            rect = self.rects[i]
-            self.rects[i] = (rect[0] - self.speed, rect[1], RECT_WIDTH, rect[3])
-        
-        # Keep removing off-screen rectangles and generating new ones
-        # Use while loop to handle high speeds where multiple pairs go off-screen per frame
-        while len(self.rects) > 0 and self.rects[0][0] + RECT_WIDTH < 0:
-            # Remove leftmost pair
-            self.rects.pop(0)
-            self.rects.pop(0)
-            self.score += 1
-        
-        # Keep generating new pairs until the screen is filled
-        # This prevents gaps when moving at high speeds
-        while len(self.rects) > 0 and self.rects[-2][0] < WIN_WIDTH:
-            # Generate new pair on the right
-            last_top_height = self.rects[-2][3]
-            new_top_height = random.randint(
-                max(0, last_top_height - self.spacer),
-                min(300, last_top_height + self.spacer)
-            )
-            
-            last_x = self.rects[-2][0]
-            self.rects.append((last_x + RECT_WIDTH, 0, RECT_WIDTH, new_top_height))
-            self.rects.append((last_x + RECT_WIDTH, new_top_height + TERRAIN_GAP, RECT_WIDTH, WIN_HEIGHT))
+    def paint_column(self, slot):
+        """Paint one heightmap ring slot into the terrain surface"""
+        x = slot * RECT_WIDTH
+        top_height = self.heights[slot]
+        self.surface.fill(BLACK, (x, 0, RECT_WIDTH, WIN_HEIGHT))
+        self.surface.fill(GREEN, (x, 0, RECT_WIDTH, top_height))
+        self.surface.fill(GREEN, (x, top_height + TERRAIN_GAP, RECT_WIDTH, WIN_HEIGHT))
     
-    def draw(self):
-        """Draw terrain on window"""
-        for rect in self.rects:
-            pygame.draw.rect(self.window, GREEN, rect)
+    def visible_span(self, alpha=1.0):
+        """Return (x, first ring slot, column count) of the terrain to draw
         
-        # Draw border
-        pygame.draw.rect(self.window, BLACK, [0, 0, WIN_WIDTH, WIN_HEIGHT], 12)
-    
-    def check_collision(self, player_rect):
-        """Check if player collides with terrain"""
-        for rect in self.rects:
-            terrain_rect = pygame.Rect(rect)
-            if player_rect.colliderect(terrain_rect):
-                return True
-        return False
+        alpha places the terrain between the previous step (0) and the
+        current one (1), so rendering faster than the simulation stays smooth.
+        """
+        # Undo the part of the last scroll not reached yet. Columns dropped
+        # off the left during that step are still in the history slots just
+        # before start, so bring back as many as the shift uncovers.
+        x = math.floor(self.x + (1 - alpha) * self.last_scroll)
+        history = min(max(0, -(-x // RECT_WIDTH)), self.history_columns)
+        x -= history * RECT_WIDTH
+        return x, (self.start - history) % self.capacity, self.count + history
     
-    def update_difficulty(self):
-        """Update speed and spacer based on score with progressive thresholds"""
-        # Check if we've reached the next speed threshold
-        if self.score >= self.next_speed_threshold:
-            self.speed_level += 1
-            # Next threshold increases progressively: 50, 100, 150, 200, etc.
-            self.next_speed_threshold += SPEED_INCREASE_RATE * (self.speed_level + 1)
+    def draw(self, alpha=1.0):
+        """Draw terrain on window, alpha of the way from the previous step to the current one"""
+        # Paint only the columns generated since the last draw
+        new_columns = min(self.generated - self.painted, self.count)
+        for i in range(self.count - new_columns, self.count):
+            self.paint_column((self.start + i) % self.capacity)
+        self.painted = self.generated
+        
+        x, start, count = self.visible_span(alpha)
         
-        # Calculate speed based on speed level
-        self.speed = INITIAL_MAP_SPEED + self.speed_level
+        # Blit the visible slots; a span that wraps around the end of the
+        # ring takes a second blit for the part starting at slot 0
+        end = start + count
+        run = min(end, self.capacity) - start
+        self.window.blit(self.surface, (x, 0), (start * RECT_WIDTH, 0, run * RECT_WIDTH, WIN_HEIGHT))
+        if end > self.capacity:
+            wrapped = end - self.capacity
+            self.window.blit(self.surface, (x + run * RECT_WIDTH, 0), (0, 0, wrapped * RECT_WIDTH, WIN_HEIGHT))
         
-        # Spacer still increases linearly with score
-        self.spacer = TERRAIN_VARIATION + self.score // SPACER_INCREASE_RATE
\ No newline at end of file
+        # Clear anything right of the last column (only possible before the
+        # first scroll when WIN_WIDTH is not a multiple of RECT_WIDTH)
+        right = x + count * RECT_WIDTH
+        if right < WIN_WIDTH:
+            self.window.fill(BLACK, (right, 0, WIN_WIDTH - right, WIN_HEIGHT))
+        
+        # Draw border
+        pygame.draw.rect(self.window, BLACK, [0, 0, WIN_WIDTH, WIN_HEIGHT], 12)
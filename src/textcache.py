@@ -0,0 +1,59 @@
+"""
+Cache of rendered text surfaces
+"""
+from collections import OrderedDict
+import pygame
+from src.settings import *
+
+OUTLINE_OFFSETS = [(-2, -2), (-2, 2), (2, -2), (2, 2)]
+OUTLINE_WIDTH = 2
+
+
+class TextCache:
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()  # Least recently used first
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color, outline_color=None):
+        """Return a surface with the text, outlined if outline_color is given
+        
+        Outlined surfaces are padded by OUTLINE_WIDTH on every side, so blit
+        them OUTLINE_WIDTH up and left of where the text itself should go.
+        """
+        key = (text, font, color, outline_color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        self.misses += 1
+        surface = self._compose(font, text, color, outline_color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def _compose(self, font, text, color, outline_color):
+        """Rasterize the text (and its outline) once into a single surface"""
+        text_surface = font.render(text, True, color)
+        if outline_color is None:
+            surface = text_surface
+        else:
+            # One outline render reused at every offset, then the text on top
+            outline_surface = font.render(text, True, outline_color)
+            width, height = text_surface.get_size()
+            surface = pygame.Surface((width + OUTLINE_WIDTH * 2, height + OUTLINE_WIDTH * 2), pygame.SRCALPHA)
+            for dx, dy in OUTLINE_OFFSETS:
+                surface.blit(outline_surface, (OUTLINE_WIDTH + dx, OUTLINE_WIDTH + dy))
+            surface.blit(text_surface, (OUTLINE_WIDTH, OUTLINE_WIDTH))
+        
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return surface
+    
+    def clear(self):
+        """Drop every cached surface"""
+        self.surfaces.clear()
@@ -0,0 +1,165 @@
+"""
+Copter Game - Autopilot Tournament
+
+Plays autopilot policies through thousands of seeded headless runs per
+difficulty on a process pool, then reports score distributions and
+simulation throughput. Every run's seed is derived from the base seed,
+policy, difficulty and run number, so results are identical whatever the
+number of workers.
+
+Usage:
+    python tournament.py --runs 1000
+    python tournament.py --policies hover lookahead --difficulties Hard --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+from src.autopilot import POLICIES
+from src.settings import DIFFICULTY_MULTIPLIERS, TICK_RATE
+from src.simulation import Simulation
+
+
+def task_seed(base_seed, policy, difficulty, run):
+    """Stable 64-bit seed for one run, independent of scheduling"""
+    # String seeds are hashed with SHA-512, so this is the same in every process
+    return random.Random(f"{base_seed}:{policy}:{difficulty}:{run}").getrandbits(64)
+
+
+def play(task):
+    """Play one seeded run in a worker and return its result"""
+    policy, difficulty, run, seed, max_frames = task
+    choose = POLICIES[policy]
+    sim = Simulation(difficulty)
+    sim.reset(seed)
+
+    started = time.perf_counter()
+    done = False
+    while not done and sim.frame < max_frames:
+        _, score, done = sim.step(choose(sim))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "policy": policy,
+        "difficulty": difficulty,
+        "run": run,
+        "seed": seed,
+        "score": sim.score,
+        "frames": sim.frame,
+        "crashed": done,
+        "seconds": elapsed,
+        "worker": os.getpid(),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(results):
+    """Score distribution per (policy, difficulty)"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["policy"], result["difficulty"]), []).append(result)
+
+    summary = []
+    for (policy, difficulty), group in groups.items():
+        scores = sorted(result["score"] for result in group)
+        frames = sum(result["frames"] for result in group)
+        summary.append({
+            "policy": policy,
+            "difficulty": difficulty,
+            "runs": len(group),
+            "mean": statistics.mean(scores),
+            "stdev": statistics.pstdev(scores),
+            "min": scores[0],
+            "p10": percentile(scores, 0.10),
+            "p50": percentile(scores, 0.50),
+            "p90": percentile(scores, 0.90),
+            "max": scores[-1],
+            "survived": sum(not result["crashed"] for result in group),
+            "frames": frames,
+        })
+    return summary
+
+
+def worker_throughput(results):
+    """Runs, frames and busy-time frames per second for each worker process"""
+    workers = {}
+    for result in results:
+        stats = workers.setdefault(result["worker"], {"runs": 0, "frames": 0, "seconds": 0.0})
+        stats["runs"] += 1
+        stats["frames"] += result["frames"]
+        stats["seconds"] += result["seconds"]
+    for stats in workers.values():
+        stats["fps"] = stats["frames"] / stats["seconds"] if stats["seconds"] else 0.0
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run autopilot policies over seeded headless games")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    parser.add_argument("--difficulties", nargs="+", choices=list(DIFFICULTY_MULTIPLIERS),
+                        default=list(DIFFICULTY_MULTIPLIERS))
+    parser.add_argument("--runs", type=int, default=1000, help="runs per policy and difficulty")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the whole tournament")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--max-minutes", type=float, default=10,
+                        help="stop runs that survive this long (in game time)")
+    parser.add_argument("--json", metavar="PATH", help="also write all results to a JSON file")
+    args = parser.parse_args()
+
+    max_frames = int(args.max_minutes * 60 * TICK_RATE)
+    tasks = [
+        (policy, difficulty, run, task_seed(args.seed, policy, difficulty, run), max_frames)
+        for policy in args.policies
+        for difficulty in args.difficulties
+        for run in range(args.runs)
+    ]
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = list(pool.imap_unordered(play, tasks, chunksize=max(1, len(tasks) // (args.workers * 8))))
+    wall = time.perf_counter() - started
+
+    # Scheduling order varies with worker count; the seeded results do not
+    order = list(DIFFICULTY_MULTIPLIERS)
+    results.sort(key=lambda result: (result["policy"], order.index(result["difficulty"]), result["run"]))
+    summary = summarize(results)
+    workers = worker_throughput(results)
+    total_frames = sum(result["frames"] for result in results)
+
+    print(f"{'policy':<10} {'difficulty':<10} {'runs':>6} {'mean':>8} {'stdev':>8} "
+          f"{'min':>6} {'p10':>6} {'p50':>6} {'p90':>6} {'max':>6} {'survived':>8}")
+    for row in summary:
+        print(f"{row['policy']:<10} {row['difficulty']:<10} {row['runs']:>6} {row['mean']:>8.1f} "
+              f"{row['stdev']:>8.1f} {row['min']:>6} {row['p10']:>6} {row['p50']:>6} "
+              f"{row['p90']:>6} {row['max']:>6} {row['survived']:>8}")
+
+    print()
+    print(f"{len(results)} runs, {total_frames} frames in {wall:.2f}s "
+          f"on {args.workers} workers: {total_frames / wall:,.0f} frames/s")
+    for pid, stats in sorted(workers.items()):
+        print(f"  worker {pid}: {stats['runs']} runs, {stats['frames']} frames, {stats['fps']:,.0f} frames/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "seed": args.seed,
+                "max_frames": max_frames,
+                "wall_seconds": wall,
+                "frames_per_second": total_frames / wall,
+                "summary": summary,
+                "workers": {str(pid): stats for pid, stats in workers.items()},
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()